@@ -1,29 +1,35 @@
 from fastapi import FastAPI, Query, HTTPException, Response, Request, APIRouter, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from fastapi.responses import HTMLResponse, StreamingResponse, ORJSONResponse
+from contextlib import asynccontextmanager
+import asyncio
+import httpx
 import os
 import logging
 import psutil
 import platform
-import json # For constructing the final JSON object if needed, or for error responses
+import orjson
 from typing import Optional
 from datetime import datetime
 
 from app.models import AdviceRequest, StructuredAdvice, OutcomeFeedback, ModelResponse # Import StructuredAdvice and new Step 5 models
-from app.services.openai_client import get_streaming_response, OPENAI_DEFAULT_MODEL_INTERNAL, SYSTEM_DEFAULT_INSTRUCTIONS, get_response as get_openai_non_streaming_response, test_openai_connectivity
+from app.services.openai_client import get_streaming_response, OPENAI_DEFAULT_MODEL_INTERNAL, SYSTEM_DEFAULT_INSTRUCTIONS, get_response as get_openai_non_streaming_response, test_openai_connectivity, close_clients as close_openai_clients, warm_up_clients as warm_up_openai_clients
 from app.services.web_search_discipline import web_search_discipline, SearchDecision
 from app.services.response_logger import response_logger # Step 5: Import response logger
 from app.services.confidence_scoring import confidence_scoring_service # Step 5: Import confidence service
 from app.services.confidence_phrase_tuner import confidence_phrase_tuner # Step 5: Import phrase tuner
-from app.services.pybaseball_service import PyBaseballService # Import the PyBaseball service
+from app.services.pybaseball_service import PyBaseballError, PyBaseballService, pybaseball_service as shared_pybaseball_service # Import the PyBaseball service
+from app.services.response_cache import response_cache, STREAM_CACHE_TTL_SECONDS
+from app.services.sse_frames import sse_frame
 
 # Dependency for PyBaseballService
-async def get_pybaseball_service():
-    # In a real application, you might have more complex setup here,
-    # like connection pooling or configuration.
-    # For now, we just instantiate it.
-    # Ensure PYBASEBALL_MCP_URL is set in your environment.
-    return PyBaseballService()
+async def get_pybaseball_service() -> PyBaseballService:
+    # The same instance the streaming tool calls use; the lifespan hands it the
+    # app-wide pooled HTTP client so calls keep their TCP/TLS connections alive.
+    # Ensure PYBASEBALL_SERVICE_URL is set in your environment.
+    return shared_pybaseball_service
 
 # from app.services.chat_service import (
 #     handle_advice_request,
@@ -39,10 +45,48 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# How often to check confidence-phrases.json for edits made outside this process
+PHRASES_RELOAD_INTERVAL_SECONDS = 30
+
+async def watch_confidence_phrases():
+    """Hot-reload the confidence phrases file; costs one stat() per interval when unchanged."""
+    while True:
+        await asyncio.sleep(PHRASES_RELOAD_INTERVAL_SECONDS)
+        try:
+            confidence_phrase_tuner.maybe_reload()
+        except Exception as e:
+            logger.error(f"Error reloading confidence phrases: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared resources on startup and release them on shutdown."""
+    app.state.http_client = httpx.AsyncClient(
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        timeout=httpx.Timeout(30.0),
+        http2=True
+    )
+    shared_pybaseball_service.http_client = app.state.http_client
+    phrases_watcher = asyncio.create_task(watch_confidence_phrases())
+    # Runs in the background so startup doesn't wait on OpenAI
+    openai_warm_up = asyncio.create_task(warm_up_openai_clients())
+    try:
+        yield
+    finally:
+        phrases_watcher.cancel()
+        openai_warm_up.cancel()
+        await run_in_threadpool(response_logger.flush)
+        # Calls made after shutdown fall back to a short-lived client
+        shared_pybaseball_service.http_client = None
+        await app.state.http_client.aclose()
+        await close_openai_clients()
+
+
 app = FastAPI(
     title="Fantasy AI Backend",
     description="AI-powered fantasy sports advice, delivered via OpenAI's Responses API with streaming JSON.",
-    version="1.1.0"
+    version="1.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # --- health probe ----------------------------------------------------------
@@ -71,6 +115,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+class SSENoBufferMiddleware:
+    """
+    Stamp anti-buffering headers on every text/event-stream response so reverse
+    proxies (Nginx, Cloudflare) flush SSE chunks immediately.
+
+    Written as plain ASGI rather than @app.middleware("http"): BaseHTTPMiddleware
+    re-wraps the body iterator and can hold back streamed chunks.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if headers.get("content-type", "").startswith("text/event-stream"):
+                    headers["Cache-Control"] = "no-cache"
+                    headers["X-Accel-Buffering"] = "no"
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+app.add_middleware(SSENoBufferMiddleware)
+
 # Environment variable for the default model
 OPENAI_DEFAULT_MODEL = os.getenv("OPENAI_DEFAULT_MODEL", "gpt-4.1-mini") 
 
@@ -152,6 +226,23 @@ async def get_advice_streaming(body: AdviceRequest) -> StreamingResponse:
         if not body.conversation or len(body.conversation) == 0:
             raise HTTPException(status_code=400, detail="No conversation provided.")
         
+        # Replay the complete stream of an identical request made earlier today.
+        # The date is part of the key because date anchoring changes the prompt daily.
+        stream_cache_key = None
+        if STREAM_CACHE_TTL_SECONDS > 0 and not body.previous_response_id:
+            stream_cache_key = response_cache.make_key(
+                {"body": body.model_dump(), "date": datetime.now().strftime("%Y-%m-%d")},
+                prefix="advice-stream"
+            )
+            cached_stream = await response_cache.get_stream(stream_cache_key)
+            if cached_stream is not None:
+                logger.info(f"Replaying cached stream {stream_cache_key}")
+                return StreamingResponse(
+                    iter((cached_stream,)),
+                    media_type="text/event-stream",
+                    headers={"Connection": "keep-alive"}
+                )
+        
         # Get the latest message content for logging and search discipline
         latest_message = body.conversation[-1].content if body.conversation else "No content"
         logger.info(f"Latest message: {latest_message[:100]}...")
@@ -207,6 +298,9 @@ async def get_advice_streaming(body: AdviceRequest) -> StreamingResponse:
         async def streaming_response_with_logging():
             final_advice = None
             openai_response_id = None
+            # Frames of this stream, kept for the replay cache until it ends cleanly
+            frames = [] if stream_cache_key else None
+            cacheable = False
             
             async for chunk in get_streaming_response(
                 conversation_messages=conversation_messages,
@@ -214,24 +308,34 @@ async def get_advice_streaming(body: AdviceRequest) -> StreamingResponse:
                 model=model_to_use,
                 enable_web_search=enable_web_search_final,
                 prompt_type=body.prompt_type or "default",
-                use_step2_architecture=body.use_step2_architecture if body.use_step2_architecture is not None else True
+                use_step2_architecture=body.use_step2_architecture if body.use_step2_architecture is not None else True,
+                partial_advice=bool(body.partial_advice)
             ):
                 # Pass through all chunks
                 yield chunk
                 
+                # Retry frames and heartbeat comments only matter while waiting live
+                if frames is not None and not chunk.startswith((b"event: retry", b":")):
+                    frames.append(chunk)
+                if chunk.startswith(b"event: error"):
+                    frames = None
+                
                 # Capture final response for logging
-                if chunk.startswith("event: response_complete"):
+                if chunk.startswith(b"event: response_complete"):
                     try:
                         # Extract the final JSON from the chunk
-                        data_start = chunk.find("data: ") + 6
-                        data_json = json.loads(chunk[data_start:].split("\n")[0])
+                        data_start = chunk.find(b"data: ") + 6
+                        data_json = orjson.loads(chunk[data_start:].split(b"\n", 1)[0])
+                        # Fallback responses are not worth replaying
+                        cacheable = "validation_error" not in data_json and "parse_error" not in data_json
                         
-                        if "final_json" in data_json:
+                        # Replayed cached advice was already logged when first generated
+                        if "final_json" in data_json and not data_json.get("cached"):
                             final_advice = StructuredAdvice.model_validate(data_json["final_json"])
                             openai_response_id = data_json.get("response_id")
                             
                             # Log the response with confidence scoring (Step 5)
-                            response_logger.log_response(
+                            response_logger.enqueue_response(
                                 advice=final_advice,
                                 user_query=latest_message,
                                 conversation_context=conversation_messages,
@@ -241,15 +345,16 @@ async def get_advice_streaming(body: AdviceRequest) -> StreamingResponse:
                             )
                     except Exception as e:
                         logger.error(f"Failed to log confidence data: {e}")
+            
+            if frames is not None and cacheable:
+                await response_cache.set_stream(stream_cache_key, b"".join(frames))
 
         # Stream Server-Sent Events for both web and mobile compatibility
         return StreamingResponse(
             streaming_response_with_logging(), 
             media_type="text/event-stream",
             headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no"  # Disable nginx buffering
+                "Connection": "keep-alive"  # Cache-Control/X-Accel-Buffering come from SSENoBufferMiddleware
             }
         )
 
@@ -260,16 +365,17 @@ async def get_advice_streaming(body: AdviceRequest) -> StreamingResponse:
         logger.error(f"Error in /advice endpoint: {e}", exc_info=True)
         # Return SSE-formatted error
         async def error_stream():
-            yield f"event: error\ndata: {json.dumps({'error': 'INTERNAL_SERVER_ERROR', 'message': str(e)})}\n\n"
+            yield sse_frame("error", {'error': 'INTERNAL_SERVER_ERROR', 'message': str(e)})
         return StreamingResponse(error_stream(), media_type="text/event-stream")
 
 # Example non-streaming endpoint (optional, for testing or specific use cases)
 @app.post("/advice-non-streaming", response_model=StructuredAdvice)
-async def get_advice_non_streaming(body: AdviceRequest) -> StructuredAdvice:
+async def get_advice_non_streaming(body: AdviceRequest) -> Response:
     """
     Get AI-powered fantasy sports advice as a single JSON object (non-streaming).
     This endpoint is primarily for testing or use cases where streaming is not preferred.
-    It directly returns a `StructuredAdvice` Pydantic model.
+    The `StructuredAdvice` model is serialized with `model_dump_json()` so FastAPI
+    does not re-validate and re-encode it.
     """
     try:
         logger.info(f"Received non-streaming advice request: {body.conversation[-1].content if body.conversation else 'No prompt'}")
@@ -311,8 +417,8 @@ async def get_advice_non_streaming(body: AdviceRequest) -> StructuredAdvice:
         logger.info(f"Relaying to OpenAI service (non-streaming) with prompt: {user_prompt[:100]}... using model: {model_to_use}")
         logger.info(f"Date anchoring applied to conversation messages")
 
-        # Call the synchronous, non-streaming function that returns a parsed StructuredAdvice object
-        advice_object = get_openai_non_streaming_response(
+        # Await the async, non-streaming function that returns a parsed StructuredAdvice object
+        advice_object = await get_openai_non_streaming_response(
             prompt=user_prompt, 
             model=model_to_use,
             enable_web_search=enable_web_search_final,
@@ -320,7 +426,7 @@ async def get_advice_non_streaming(body: AdviceRequest) -> StructuredAdvice:
         )
 
         # Step 5: Log confidence scoring data
-        response_logger.log_response(
+        response_logger.enqueue_response(
             advice=advice_object,
             user_query=user_prompt,
             conversation_context=conversation_messages,
@@ -329,7 +435,7 @@ async def get_advice_non_streaming(body: AdviceRequest) -> StructuredAdvice:
             response_id=None  # Non-streaming doesn't have OpenAI response ID
         )
 
-        return advice_object
+        return Response(content=advice_object.model_dump_json(), media_type="application/json")
 
     except HTTPException as he:
         logger.error(f"HTTPException in /advice-non-streaming: {he.detail}")
@@ -412,7 +518,9 @@ async def submit_feedback(feedback: OutcomeFeedback):
         Status of feedback submission
     """
     try:
-        success = response_logger.update_response_outcome(
+        # Waits briefly for queued log writes, so keep it off the event loop
+        success = await run_in_threadpool(
+            response_logger.update_response_outcome,
             response_id=feedback.response_id,
             outcome=feedback.outcome,
             feedback_notes=feedback.feedback_notes
@@ -450,18 +558,23 @@ async def get_confidence_stats(days_back: int = Query(7, description="Days to lo
         raise HTTPException(status_code=500, detail=f"Error getting confidence stats: {str(e)}")
 
 @app.get("/confidence/recent")
-async def get_recent_confidence_logs(limit: int = Query(20, description="Number of recent logs to return")):
+async def get_recent_confidence_logs(
+    limit: int = Query(20, description="Number of recent logs to return"),
+    include_content: bool = Query(True, description="Include response text, query and conversation context")
+):
     """
     Get recent confidence scoring logs for monitoring.
     
     Args:
         limit: Maximum number of logs to return
+        include_content: Whether to load and return the large text fields
         
     Returns:
         Recent confidence logs
     """
     try:
-        logs = response_logger.get_recent_logs(limit)
+        # Waits briefly for queued log writes, so keep it off the event loop
+        logs = await run_in_threadpool(response_logger.get_recent_logs, limit, include_content=include_content)
         return {
             "logs": logs,
             "total_count": len(logs),
@@ -564,7 +677,9 @@ app.include_router(settings_router)
 
 # Add a new endpoint to test PyBaseball service connection
 @app.get("/pybaseball/health")
-async def pybaseball_health_check():
+async def pybaseball_health_check(
+    pybaseball_service: PyBaseballService = Depends(get_pybaseball_service)
+):
     """Check if the PyBaseball service is accessible."""
     try:
         # Test the connection by searching for a player
@@ -576,7 +691,11 @@ async def pybaseball_health_check():
 
 # Add baseball data endpoints
 @app.get("/pybaseball/player/{player_name}")
-async def get_player_stats(player_name: str, year: Optional[int] = None):
+async def get_player_stats(
+    player_name: str,
+    year: Optional[int] = None,
+    pybaseball_service: PyBaseballService = Depends(get_pybaseball_service)
+):
     """Get statistics for a specific player."""
     try:
         result = await pybaseball_service.get_player_stats(player_name, year)
@@ -701,21 +820,36 @@ async def get_team_statistics(
         logger.error(f"Error in get_team_statistics endpoint: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/pybaseball/cache/clear")
+@app.post("/advice/cache/clear", status_code=204, response_class=Response)
+async def clear_advice_cache():
+    """
+    Clear cached advice and replayable /advice streams.
+    Returns 204 No Content on success.
+    """
+    try:
+        await response_cache.clear()
+    except Exception as e:
+        logger.error(f"Error in clear_advice_cache endpoint: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+    return Response(status_code=204)
+
+@app.post("/pybaseball/cache/clear", status_code=204, response_class=Response)
 async def clear_pybaseball_cache(
     pybaseball_service: PyBaseballService = Depends(get_pybaseball_service) # Corrected
 ):
     """
     Clear the PyBaseball statistics cache.
+    Returns 204 No Content on success; upstream failures are surfaced as 502.
     """
     try:
-        # Example of how the service would be called:
-        # result = await pybaseball_service.clear_pybaseball_cache()
-        # return result
-        return await pybaseball_service.clear_pybaseball_cache()
+        result = await pybaseball_service.clear_pybaseball_cache()
     except Exception as e:
         logger.error(f"Error in clear_pybaseball_cache endpoint: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+    # The service reports upstream failures as a PyBaseballError result rather than raising
+    if isinstance(result, PyBaseballError):
+        raise HTTPException(status_code=502, detail=str(result))
+    return Response(status_code=204)
 
 @app.get("/pybaseball/service_health")
 async def check_pybaseball_service_health(
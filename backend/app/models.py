@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional, Literal
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, create_engine
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, Index, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -18,6 +18,7 @@ class AdviceRequest(BaseModel):
     prompt_type: Optional[Literal["default", "detailed", "baseball", "football", "basketball"]] = "default"  # Prompt type selection
     previous_response_id: Optional[str] = None  # For OpenAI conversation state management
     use_step2_architecture: Optional[bool] = True  # Enable Step 2 slim prompt architecture
+    partial_advice: Optional[bool] = False  # Stream main_advice text in partial_advice events as it's generated
 
 # New/Updated Models for Structured JSON Output
 class AdviceAlternative(BaseModel):
@@ -35,11 +36,6 @@ class StructuredAdvice(BaseModel):
     alternatives: Optional[List[str]] = Field(default=None, description="Alternative considerations or options")
     model_identifier: Optional[str] = Field(default=None, description="Model used for generating the response")
 
-    class Config:
-        # Pydantic model config if needed, e.g., for aliasing or example generation
-        # For now, standard config is fine.
-        pass
-
 # Step 5: Confidence Scoring Models
 class ConfidenceLogEntry(BaseModel):
     """Pydantic model for confidence scoring log entries."""
@@ -78,13 +74,29 @@ class ConfidenceLog(Base):
     feedback_timestamp = Column(DateTime, nullable=True)
     response_id = Column(String(200), nullable=True, unique=True)
     
-    def to_dict(self):
-        return {
+    # Analytics queries filter on "outcome IS NOT NULL AND timestamp >= cutoff";
+    # these keep them range scans instead of full-table scans.
+    # Retention cleanup filters on "timestamp < cutoff" alone, which needs its own index.
+    __table_args__ = (
+        Index("ix_conflog_timestamp", timestamp),
+        Index("ix_conflog_outcome_ts", outcome, timestamp),
+        Index(
+            "ix_conflog_ts_outcome_notnull",
+            timestamp,
+            postgresql_where=outcome.isnot(None),
+            sqlite_where=outcome.isnot(None)
+        ),
+    )
+    
+    def to_dict(self, include_content: bool = True):
+        """
+        Args:
+            include_content: Include the large text columns (response_text, user_query,
+                conversation_context). Pass False when they were not loaded.
+        """
+        data = {
             'id': self.id,
-            'response_text': self.response_text,
             'confidence_score': self.confidence_score,
-            'user_query': self.user_query,
-            'conversation_context': self.conversation_context,
             'model_used': self.model_used,
             'web_search_used': self.web_search_used,
             'outcome': self.outcome,
@@ -92,6 +104,11 @@ class ConfidenceLog(Base):
             'feedback_timestamp': self.feedback_timestamp.isoformat() if self.feedback_timestamp else None,
             'response_id': self.response_id
         }
+        if include_content:
+            data['response_text'] = self.response_text
+            data['user_query'] = self.user_query
+            data['conversation_context'] = self.conversation_context
+        return data
 
 # AdviceResponse is no longer used by the streaming /advice endpoint, 
 # but can be kept if there are other non-streaming use cases or for reference.
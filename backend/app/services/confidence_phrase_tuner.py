@@ -3,18 +3,37 @@ Step 5.3: Auto-tune Phrases Service
 Implements automatic confidence phrase calibration as per prompt improvement guide.
 """
 
-import json
 import logging
 import os
 import shutil
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+import orjson
+from cachetools import TTLCache, cachedmethod
+from cachetools.keys import hashkey
+
 from app.services.confidence_scoring import confidence_scoring_service
 
 logger = logging.getLogger(__name__)
 
+# Calibration analysis only changes as new outcomes arrive, so a short TTL keeps
+# the tuning/status endpoints from re-aggregating the log table on every hit.
+CALIBRATION_CACHE_TTL_SECONDS = 300
+
+def _utcnow() -> datetime:
+    """
+    Current UTC time as a naive datetime, the format every stored timestamp already
+    uses (phrases file, history entries and the confidence log); equivalent to the
+    deprecated datetime.utcnow().
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _now_iso() -> str:
+    """Current UTC time as a naive ISO-8601 string."""
+    return _utcnow().isoformat()
+
 class ConfidencePhraseTuner:
     """
     Service for automatically tuning confidence phrases based on calibration data.
@@ -29,26 +48,51 @@ class ConfidencePhraseTuner:
         else:
             self.phrases_file_path = Path(phrases_file_path)
         
+        # Stat before reading so an edit landing mid-load is picked up next check
+        self._mtime = self._file_mtime_ns()
         self.phrases_data = self._load_phrases()
+        self._drift_cache = TTLCache(maxsize=8, ttl=CALIBRATION_CACHE_TTL_SECONDS)
         logger.info(f"Confidence phrase tuner initialized with file: {self.phrases_file_path}")
     
     def _load_phrases(self) -> Dict:
         """Load confidence phrases from JSON file."""
         try:
-            with open(self.phrases_file_path, 'r') as f:
-                return json.load(f)
+            return orjson.loads(self.phrases_file_path.read_bytes())
         except FileNotFoundError:
             logger.error(f"Phrases file not found: {self.phrases_file_path}")
             return self._create_default_phrases()
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"Invalid JSON in phrases file: {e}")
             return self._create_default_phrases()
     
+    def _file_mtime_ns(self) -> Optional[int]:
+        """Modification time of the phrases file, or None if it does not exist."""
+        try:
+            return self.phrases_file_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+    
+    def maybe_reload(self) -> bool:
+        """
+        Re-read the phrases file if it changed on disk since the last load or save.
+        
+        Returns:
+            True if the file was reloaded
+        """
+        mtime = self._file_mtime_ns()
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        self.phrases_data = self._load_phrases()
+        self.clear_calibration_cache()
+        logger.info(f"Reloaded phrases file: {self.phrases_file_path}")
+        return True
+    
     def _create_default_phrases(self) -> Dict:
         """Create default phrases structure if file is missing."""
         return {
             "version": "1.0.0",
-            "last_updated": datetime.utcnow().isoformat(),
+            "last_updated": _now_iso(),
             "confidence_bands": {},
             "auto_tune_settings": {
                 "enabled": True,
@@ -61,23 +105,33 @@ class ConfidencePhraseTuner:
             "usage_statistics": {}
         }
     
-    def _save_phrases(self, backup: bool = True) -> bool:
-        """Save phrases data to file with optional backup."""
+    def _save_phrases(self, backup: bool = True, timestamp: Optional[str] = None) -> bool:
+        """
+        Save phrases data to file with optional backup.
+
+        Args:
+            backup: Copy the current file aside before overwriting it
+            timestamp: ISO timestamp of the calling operation, reused for last_updated
+        """
         try:
+            now = _utcnow()
             if backup and self.phrases_file_path.exists():
                 # Create backup
                 backup_path = self.phrases_file_path.with_suffix(
-                    f'.backup.{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.json'
+                    f'.backup.{now.strftime("%Y%m%d_%H%M%S")}.json'
                 )
                 shutil.copy2(self.phrases_file_path, backup_path)
                 logger.info(f"Created backup: {backup_path}")
             
             # Update timestamp
-            self.phrases_data["last_updated"] = datetime.utcnow().isoformat()
+            self.phrases_data = {**self.phrases_data, "last_updated": timestamp or now.isoformat()}
             
-            # Save updated phrases
-            with open(self.phrases_file_path, 'w') as f:
-                json.dump(self.phrases_data, f, indent=2)
+            # Write to a sibling temp file and swap it in so readers never see a partial file
+            tmp_path = self.phrases_file_path.with_suffix(".tmp")
+            tmp_path.write_bytes(orjson.dumps(self.phrases_data, option=orjson.OPT_INDENT_2))
+            os.replace(tmp_path, self.phrases_file_path)
+            # Our own write shouldn't trigger a reload
+            self._mtime = self._file_mtime_ns()
             
             logger.info(f"Updated phrases file: {self.phrases_file_path}")
             return True
@@ -99,10 +153,12 @@ class ConfidencePhraseTuner:
         # Fallback
         return None
     
+    @cachedmethod(lambda self: self._drift_cache, key=lambda self, days_back=7: hashkey(days_back))
     def analyze_calibration_drift(self, days_back: int = 7) -> Dict:
         """
         Analyze calibration drift for each confidence band.
         Returns bands that need recalibration.
+        Results are cached per ``days_back`` for CALIBRATION_CACHE_TTL_SECONDS.
         """
         logger.info(f"Analyzing calibration drift for last {days_back} days")
         
@@ -159,7 +215,7 @@ class ConfidencePhraseTuner:
                 })
         
         return {
-            "analysis_timestamp": datetime.utcnow().isoformat(),
+            "analysis_timestamp": _now_iso(),
             "period_days": days_back,
             "analysis_results": analysis_results,
             "bands_needing_adjustment": bands_needing_adjustment,
@@ -167,6 +223,10 @@ class ConfidencePhraseTuner:
             "calibration_threshold": calibration_threshold
         }
     
+    def clear_calibration_cache(self) -> None:
+        """Drop cached calibration analyses so the next call re-reads the logs."""
+        self._drift_cache.clear()
+    
     def _map_distribution_to_phrase_band(self, distribution_band: str) -> Optional[str]:
         """Map distribution band names to phrase band keys."""
         mapping = {
@@ -199,6 +259,9 @@ class ConfidencePhraseTuner:
         
         actions_taken = []
         phrases_updated = 0
+        now = _now_iso()
+        # Copy-on-write: build the new bands aside and swap them in whole
+        new_bands = dict(self.phrases_data["confidence_bands"])
         
         for band_adjustment in analysis["bands_needing_adjustment"]:
             band_key = band_adjustment["phrase_band"]
@@ -214,8 +277,11 @@ class ConfidencePhraseTuner:
             if updated_phrases:
                 if not dry_run:
                     # Update the phrases
-                    self.phrases_data["confidence_bands"][band_key]["phrases"] = updated_phrases
-                    self.phrases_data["confidence_bands"][band_key]["last_calibrated"] = datetime.utcnow().isoformat()
+                    new_bands[band_key] = {
+                        **new_bands[band_key],
+                        "phrases": updated_phrases,
+                        "last_calibrated": now
+                    }
                     phrases_updated += 1
                 
                 actions_taken.append({
@@ -229,7 +295,7 @@ class ConfidencePhraseTuner:
         
         # Record calibration event
         calibration_record = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": now,
             "period_analyzed": days_back,
             "bands_adjusted": len(actions_taken),
             "actions": actions_taken,
@@ -237,13 +303,19 @@ class ConfidencePhraseTuner:
         }
         
         if not dry_run and actions_taken:
-            # Save updated phrases
-            self.phrases_data["calibration_history"].append(calibration_record)
+            # Swap in the updated bands, then save
+            self.phrases_data = {
+                **self.phrases_data,
+                "confidence_bands": new_bands,
+                "calibration_history": [*self.phrases_data["calibration_history"], calibration_record]
+            }
             success = self._save_phrases(
-                backup=self.phrases_data["auto_tune_settings"]["backup_on_update"]
+                backup=self.phrases_data["auto_tune_settings"]["backup_on_update"],
+                timestamp=now
             )
             
             if success:
+                self.clear_calibration_cache()
                 logger.info(f"Auto-tuning completed: {phrases_updated} bands updated")
             else:
                 logger.error("Failed to save updated phrases")
@@ -326,22 +398,31 @@ class ConfidencePhraseTuner:
             return False
         
         try:
-            old_phrases = self.phrases_data["confidence_bands"][band_key]["phrases"]
-            self.phrases_data["confidence_bands"][band_key]["phrases"] = new_phrases
-            self.phrases_data["confidence_bands"][band_key]["last_calibrated"] = datetime.utcnow().isoformat()
+            now = _now_iso()
+            bands = self.phrases_data["confidence_bands"]
+            old_phrases = bands[band_key]["phrases"]
+            new_bands = {
+                **bands,
+                band_key: {**bands[band_key], "phrases": new_phrases, "last_calibrated": now}
+            }
             
             # Record manual update
             manual_record = {
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": now,
                 "type": "manual_update",
                 "band": band_key,
                 "old_phrases": old_phrases,
                 "new_phrases": new_phrases
             }
-            self.phrases_data["calibration_history"].append(manual_record)
+            self.phrases_data = {
+                **self.phrases_data,
+                "confidence_bands": new_bands,
+                "calibration_history": [*self.phrases_data["calibration_history"], manual_record]
+            }
             
-            success = self._save_phrases(backup=True)
+            success = self._save_phrases(backup=True, timestamp=now)
             if success:
+                self.clear_calibration_cache()
                 logger.info(f"Manually updated phrases for band: {band_key}")
             return success
             
@@ -4,24 +4,69 @@ Implements confidence scoring calibration as per prompt improvement guide.
 """
 
 import os
-import json
+import orjson
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-from sqlalchemy import create_engine, func
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import case, create_engine, delete, event, func, insert, select, update
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import StaticPool
 from sqlalchemy.exc import SQLAlchemyError
+from cachetools import TTLCache, cachedmethod
+from cachetools.keys import hashkey
 
 from app.models import Base, ConfidenceLog, ConfidenceLogEntry, OutcomeFeedback
 
 logger = logging.getLogger(__name__)
 
+# Statements slower than this are logged with their SQL
+SLOW_QUERY_THRESHOLD_SECONDS = 0.1
+
+# Aggregate stats are also keyed on a write generation, so this TTL only bounds
+# staleness from writes made by other processes.
+STATS_CACHE_TTL_SECONDS = 60
+
+# Rows deleted per transaction by cleanup_old_entries, to keep write locks short
+CLEANUP_BATCH_SIZE = 1000
+
+def _json_dumps(value) -> str:
+    """orjson-backed encoding for the conversation_context column, which stores JSON text."""
+    return orjson.dumps(value).decode()
+
 class ConfidenceScoringService:
     """
     Service for managing confidence scoring logs and calibration.
     Implements Step 5 from the prompt improvement guide.
     """
     
+    # Confidence bands as (min, max, name), half-open on the right
+    _BANDS = (
+        (0.0, 0.5, "low"),
+        (0.5, 0.7, "medium"),
+        (0.7, 0.9, "high"),
+        (0.9, 1.0, "very_high")
+    )
+    
+    # Columns returned by get_recent_entries, in ConfidenceLog.to_dict order
+    _SUMMARY_COLUMNS = (
+        ConfidenceLog.id,
+        ConfidenceLog.confidence_score,
+        ConfidenceLog.model_used,
+        ConfidenceLog.web_search_used,
+        ConfidenceLog.outcome,
+        ConfidenceLog.timestamp,
+        ConfidenceLog.feedback_timestamp,
+        ConfidenceLog.response_id
+    )
+    _CONTENT_COLUMNS = (
+        ConfidenceLog.response_text,
+        ConfidenceLog.user_query,
+        ConfidenceLog.conversation_context
+    )
+    
     def __init__(self, database_url: Optional[str] = None):
         """Initialize the confidence scoring service."""
         self.database_url = database_url or os.getenv(
@@ -30,18 +75,95 @@ class ConfidenceScoringService:
         )
         
         # Create engine and session factory
-        self.engine = create_engine(self.database_url)
+        self.engine = create_engine(self.database_url, **self._engine_options(self.database_url))
+        self._install_slow_query_logging()
+        if self.engine.dialect.name == "sqlite":
+            self._install_sqlite_pragmas()
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
         
+        # Brier/distribution results, invalidated by bumping the generation on every write
+        self._stats_cache = TTLCache(maxsize=32, ttl=STATS_CACHE_TTL_SECONDS)
+        self._stats_cache_lock = threading.Lock()
+        self._generation = 0
+        
         # Create tables if they don't exist
         Base.metadata.create_all(bind=self.engine)
+        # create_all skips tables that already exist, so add any indexes
+        # introduced after the table was first created
+        for index in ConfidenceLog.__table__.indexes:
+            index.create(bind=self.engine, checkfirst=True)
         
-        logger.info(f"Confidence scoring service initialized with database: {self.database_url}")
+        logger.info("Confidence scoring service initialized with database: %s", self.database_url)
+    
+    @staticmethod
+    def _engine_options(database_url: str) -> Dict:
+        """Connection pool settings for the configured database backend."""
+        if database_url.startswith("sqlite"):
+            options = {"connect_args": {"check_same_thread": False}}
+            if ":memory:" in database_url or database_url.rstrip("/") == "sqlite:":
+                # Every connection to :memory: is a new empty database, so share one
+                options["poolclass"] = StaticPool
+            return options
+        return {
+            "pool_size": 10,
+            "max_overflow": 20,
+            "pool_pre_ping": True,
+            "pool_recycle": 1800
+        }
+    
+    def _install_slow_query_logging(self) -> None:
+        """Log any statement that takes longer than SLOW_QUERY_THRESHOLD_SECONDS."""
+        @event.listens_for(self.engine, "before_cursor_execute")
+        def _start_timer(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+        
+        @event.listens_for(self.engine, "after_cursor_execute")
+        def _log_if_slow(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+            if elapsed > SLOW_QUERY_THRESHOLD_SECONDS:
+                logger.warning("Slow query (%.0f ms): %s", elapsed * 1000, statement)
+    
+    def _install_sqlite_pragmas(self) -> None:
+        """
+        Tune SQLite for append-heavy logging with read-mostly analytics: WAL lets
+        readers run alongside a writer, and synchronous=NORMAL is durable under WAL
+        with far fewer fsyncs.
+        """
+        @event.listens_for(self.engine, "connect")
+        def _set_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+            cursor.execute("PRAGMA mmap_size=268435456")
+            cursor.execute("PRAGMA cache_size=-65536")
+            cursor.close()
     
     def get_db_session(self) -> Session:
         """Get a database session."""
         return self.SessionLocal()
     
+    @contextmanager
+    def session_scope(self, invalidates_stats: bool = False) -> Iterator[Session]:
+        """
+        Session that commits on success, rolls back on error and always closes.
+        
+        Args:
+            invalidates_stats: The block writes log rows; expire cached aggregates after commit
+        """
+        db = self.SessionLocal()
+        try:
+            yield db
+            db.commit()
+            if invalidates_stats:
+                with self._stats_cache_lock:
+                    self._generation += 1
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
     def log_confidence_entry(
         self,
         response_text: str,
@@ -56,225 +178,273 @@ class ConfidenceScoringService:
         Log a confidence scoring entry to the database.
         Returns the entry ID.
         """
-        db = self.get_db_session()
         try:
-            # Serialize conversation context if provided
-            context_json = json.dumps(conversation_context) if conversation_context else None
-            
-            entry = ConfidenceLog(
-                response_text=response_text,
-                confidence_score=confidence_score,
-                user_query=user_query,
-                conversation_context=context_json,
-                model_used=model_used,
-                web_search_used=web_search_used,
-                response_id=response_id,
-                timestamp=datetime.utcnow()
-            )
-            
-            db.add(entry)
-            db.commit()
-            db.refresh(entry)
-            
-            logger.info(f"Logged confidence entry {entry.id} with score {confidence_score}")
-            return entry.id
+            with self.session_scope(invalidates_stats=True) as db:
+                entry = ConfidenceLog(
+                    response_text=response_text,
+                    confidence_score=confidence_score,
+                    user_query=user_query,
+                    conversation_context=_json_dumps(conversation_context) if conversation_context else None,
+                    model_used=model_used,
+                    web_search_used=web_search_used,
+                    response_id=response_id,
+                    timestamp=datetime.utcnow()
+                )
+                
+                db.add(entry)
+                db.flush()  # assigns entry.id before the scope commits
+                
+                logger.info("Logged confidence entry %s with score %s", entry.id, confidence_score)
+                return entry.id
+                
+        except SQLAlchemyError as e:
+            logger.error("Error logging confidence entry: %s", e)
+            raise
+    
+    def log_confidence_entries(self, entries: List[Dict]) -> int:
+        """
+        Log several confidence entries with one executemany INSERT and a single commit.
+        
+        Args:
+            entries: Dicts with the same keys as log_confidence_entry's arguments
             
+        Returns:
+            Number of rows inserted
+        """
+        if not entries:
+            return 0
+        
+        now = datetime.utcnow()
+        rows = [
+            {
+                "response_text": entry["response_text"],
+                "confidence_score": entry["confidence_score"],
+                "user_query": entry["user_query"],
+                "conversation_context": (
+                    _json_dumps(entry["conversation_context"]) if entry.get("conversation_context") else None
+                ),
+                "model_used": entry["model_used"],
+                "web_search_used": entry.get("web_search_used", False),
+                "response_id": entry.get("response_id"),
+                "timestamp": entry.get("timestamp") or now
+            }
+            for entry in entries
+        ]
+        
+        try:
+            with self.session_scope(invalidates_stats=True) as db:
+                db.execute(insert(ConfidenceLog), rows)
+                
+                logger.info("Logged %s confidence entries in one batch", len(rows))
+                return len(rows)
+                
         except SQLAlchemyError as e:
-            logger.error(f"Error logging confidence entry: {e}")
-            db.rollback()
+            logger.error("Error logging confidence entries: %s", e)
             raise
-        finally:
-            db.close()
     
     def update_outcome(self, response_id: str, outcome: bool, feedback_notes: Optional[str] = None) -> bool:
         """
         Update the outcome for a logged entry.
         Returns True if successful, False if entry not found.
         """
-        db = self.get_db_session()
         try:
-            entry = db.query(ConfidenceLog).filter(ConfidenceLog.response_id == response_id).first()
-            
-            if not entry:
-                logger.warning(f"No confidence log entry found for response_id: {response_id}")
-                return False
-            
-            entry.outcome = outcome
-            entry.feedback_timestamp = datetime.utcnow()
-            
-            db.commit()
-            logger.info(f"Updated outcome for entry {entry.id}: {outcome}")
-            return True
-            
+            with self.session_scope(invalidates_stats=True) as db:
+                # Single UPDATE via the unique index on response_id; no ORM load
+                result = db.execute(
+                    update(ConfidenceLog)
+                    .where(ConfidenceLog.response_id == response_id)
+                    .values(outcome=outcome, feedback_timestamp=datetime.utcnow())
+                )
+                
+                if not result.rowcount:
+                    logger.warning("No confidence log entry found for response_id: %s", response_id)
+                    return False
+                
+                logger.info("Updated outcome for response %s: %s", response_id, outcome)
+                return True
+                
         except SQLAlchemyError as e:
-            logger.error(f"Error updating outcome: {e}")
-            db.rollback()
+            logger.error("Error updating outcome: %s", e)
             raise
-        finally:
-            db.close()
     
+    @cachedmethod(
+        lambda self: self._stats_cache,
+        key=lambda self, days_back=7: hashkey("brier", days_back, self._generation),
+        lock=lambda self: self._stats_cache_lock
+    )
     def calculate_brier_score(self, days_back: int = 7) -> Dict:
         """
         Calculate Brier score for entries with known outcomes from the last N days.
         Returns Brier score and related statistics.
         """
-        db = self.get_db_session()
         try:
-            cutoff_date = datetime.utcnow() - timedelta(days=days_back)
-            
-            # Get entries with known outcomes from the specified period
-            entries = db.query(ConfidenceLog).filter(
-                ConfidenceLog.outcome.isnot(None),
-                ConfidenceLog.timestamp >= cutoff_date
-            ).all()
-            
-            if not entries:
-                return {
-                    "brier_score": None,
-                    "entries_count": 0,
+            with self.session_scope() as db:
+                cutoff_date = datetime.utcnow() - timedelta(days=days_back)
+                
+                # Aggregate in SQL so no rows are hydrated or shipped to Python
+                actual_outcome = case((ConfidenceLog.outcome == True, 1.0), else_=0.0)
+                squared_error = (ConfidenceLog.confidence_score - actual_outcome) * (ConfidenceLog.confidence_score - actual_outcome)
+                entries_count, correct_predictions, avg_confidence, total_score = db.query(
+                    func.count(ConfidenceLog.id),
+                    func.sum(case((ConfidenceLog.outcome == True, 1), else_=0)),
+                    func.avg(ConfidenceLog.confidence_score),
+                    func.sum(squared_error)
+                ).filter(
+                    ConfidenceLog.outcome.isnot(None),
+                    ConfidenceLog.timestamp >= cutoff_date
+                ).one()
+                
+                if not entries_count:
+                    return {
+                        "brier_score": None,
+                        "entries_count": 0,
+                        "period_days": days_back,
+                        "message": "No entries with outcomes found for the specified period"
+                    }
+                
+                # Brier score: mean of (predicted_probability - actual_outcome)^2
+                brier_score = total_score / entries_count
+                
+                result = {
+                    "brier_score": brier_score,
+                    "entries_count": entries_count,
+                    "correct_predictions": correct_predictions,
+                    "accuracy": correct_predictions / entries_count,
+                    "avg_confidence": avg_confidence,
                     "period_days": days_back,
-                    "message": "No entries with outcomes found for the specified period"
+                    "calculation_date": datetime.utcnow().isoformat(),
+                    "needs_calibration": brier_score > 0.25  # From guide threshold
                 }
-            
-            # Calculate Brier score
-            total_score = 0.0
-            for entry in entries:
-                # Brier score: (predicted_probability - actual_outcome)^2
-                actual_outcome = 1.0 if entry.outcome else 0.0
-                squared_error = (entry.confidence_score - actual_outcome) ** 2
-                total_score += squared_error
-            
-            brier_score = total_score / len(entries)
-            
-            # Additional statistics
-            correct_predictions = sum(1 for entry in entries if entry.outcome)
-            avg_confidence = sum(entry.confidence_score for entry in entries) / len(entries)
-            
-            result = {
-                "brier_score": brier_score,
-                "entries_count": len(entries),
-                "correct_predictions": correct_predictions,
-                "accuracy": correct_predictions / len(entries),
-                "avg_confidence": avg_confidence,
-                "period_days": days_back,
-                "calculation_date": datetime.utcnow().isoformat(),
-                "needs_calibration": brier_score > 0.25  # From guide threshold
-            }
-            
-            logger.info(f"Calculated Brier score: {brier_score:.4f} for {len(entries)} entries")
-            return result
-            
+                
+                logger.info("Calculated Brier score: %.4f for %s entries", brier_score, entries_count)
+                return result
+                
         except SQLAlchemyError as e:
-            logger.error(f"Error calculating Brier score: {e}")
+            logger.error("Error calculating Brier score: %s", e)
             raise
-        finally:
-            db.close()
     
+    @cachedmethod(
+        lambda self: self._stats_cache,
+        key=lambda self, days_back=30: hashkey("distribution", days_back, self._generation),
+        lock=lambda self: self._stats_cache_lock
+    )
     def get_confidence_distribution(self, days_back: int = 30) -> Dict:
         """
         Get confidence score distribution and accuracy by confidence bands.
         """
-        db = self.get_db_session()
         try:
-            cutoff_date = datetime.utcnow() - timedelta(days=days_back)
-            
-            entries = db.query(ConfidenceLog).filter(
-                ConfidenceLog.outcome.isnot(None),
-                ConfidenceLog.timestamp >= cutoff_date
-            ).all()
-            
-            if not entries:
-                return {"message": "No entries with outcomes found"}
-            
-            # Define confidence bands
-            bands = [
-                (0.0, 0.5, "low"),
-                (0.5, 0.7, "medium"),
-                (0.7, 0.9, "high"),
-                (0.9, 1.0, "very_high")
-            ]
-            
-            distribution = {}
-            for min_conf, max_conf, band_name in bands:
-                band_entries = [
-                    entry for entry in entries 
-                    if min_conf <= entry.confidence_score < max_conf
-                ]
+            with self.session_scope() as db:
+                cutoff_date = datetime.utcnow() - timedelta(days=days_back)
+                
+                # Bucket and aggregate in SQL: one row per band, no per-entry rows.
+                # Scores outside every band (e.g. exactly 1.0) land in the NULL group,
+                # which still counts toward total_entries.
+                score = ConfidenceLog.confidence_score
+                band_expr = case(
+                    *[((score >= min_conf) & (score < max_conf), band_name) for min_conf, max_conf, band_name in self._BANDS],
+                    else_=None
+                ).label("band")
+                band_rows = db.query(
+                    band_expr,
+                    func.count(ConfidenceLog.id),
+                    func.avg(score),
+                    func.sum(case((ConfidenceLog.outcome == True, 1), else_=0))
+                ).filter(
+                    ConfidenceLog.outcome.isnot(None),
+                    ConfidenceLog.timestamp >= cutoff_date
+                ).group_by(band_expr).all()
+                
+                total_entries = sum(row[1] for row in band_rows)
+                if not total_entries:
+                    return {"message": "No entries with outcomes found"}
+                
+                stats_by_band = {row[0]: row for row in band_rows}
+                distribution = {}
+                for min_conf, max_conf, band_name in self._BANDS:
+                    row = stats_by_band.get(band_name)
+                    if row:
+                        _, count, avg_confidence, correct = row
+                        distribution[band_name] = {
+                            "count": count,
+                            "accuracy": correct / count,
+                            "avg_confidence": avg_confidence,
+                            "range": f"{min_conf}-{max_conf}"
+                        }
+                    else:
+                        distribution[band_name] = {
+                            "count": 0,
+                            "accuracy": None,
+                            "avg_confidence": None,
+                            "range": f"{min_conf}-{max_conf}"
+                        }
+                
+                return {
+                    "distribution": distribution,
+                    "total_entries": total_entries,
+                    "period_days": days_back
+                }
                 
-                if band_entries:
-                    correct = sum(1 for entry in band_entries if entry.outcome)
-                    avg_confidence = sum(entry.confidence_score for entry in band_entries) / len(band_entries)
-                    
-                    distribution[band_name] = {
-                        "count": len(band_entries),
-                        "accuracy": correct / len(band_entries),
-                        "avg_confidence": avg_confidence,
-                        "range": f"{min_conf}-{max_conf}"
-                    }
-                else:
-                    distribution[band_name] = {
-                        "count": 0,
-                        "accuracy": None,
-                        "avg_confidence": None,
-                        "range": f"{min_conf}-{max_conf}"
-                    }
-            
-            return {
-                "distribution": distribution,
-                "total_entries": len(entries),
-                "period_days": days_back
-            }
-            
         except SQLAlchemyError as e:
-            logger.error(f"Error getting confidence distribution: {e}")
+            logger.error("Error getting confidence distribution: %s", e)
             raise
-        finally:
-            db.close()
     
-    def get_recent_entries(self, limit: int = 50, include_pending: bool = True) -> List[Dict]:
+    def get_recent_entries(self, limit: int = 50, include_pending: bool = True, include_content: bool = True) -> List[Dict]:
         """
         Get recent confidence log entries.
+        With include_content=False the large text columns are neither loaded nor returned.
         """
-        db = self.get_db_session()
         try:
-            query = db.query(ConfidenceLog)
-            
-            if not include_pending:
-                query = query.filter(ConfidenceLog.outcome.isnot(None))
-            
-            entries = query.order_by(ConfidenceLog.timestamp.desc()).limit(limit).all()
-            
-            return [entry.to_dict() for entry in entries]
-            
+            with self.session_scope() as db:
+                # Select plain column tuples rather than hydrating ORM objects
+                columns = self._SUMMARY_COLUMNS + (self._CONTENT_COLUMNS if include_content else ())
+                query = db.query(*columns)
+                
+                if not include_pending:
+                    query = query.filter(ConfidenceLog.outcome.isnot(None))
+                
+                rows = query.order_by(ConfidenceLog.timestamp.desc()).limit(limit).all()
+                
+                entries = []
+                for row in rows:
+                    entry = row._asdict()
+                    entry["timestamp"] = row.timestamp.isoformat() if row.timestamp else None
+                    entry["feedback_timestamp"] = row.feedback_timestamp.isoformat() if row.feedback_timestamp else None
+                    entries.append(entry)
+                return entries
+                
         except SQLAlchemyError as e:
-            logger.error(f"Error getting recent entries: {e}")
+            logger.error("Error getting recent entries: %s", e)
             raise
-        finally:
-            db.close()
     
     def cleanup_old_entries(self, days_to_keep: int = 90) -> int:
         """
         Clean up old entries beyond the retention period.
         Returns number of deleted entries.
         """
-        db = self.get_db_session()
+        cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
+        old_ids = select(ConfidenceLog.id).where(
+            ConfidenceLog.timestamp < cutoff_date
+        ).limit(CLEANUP_BATCH_SIZE)
+        
         try:
-            cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
-            
-            deleted_count = db.query(ConfidenceLog).filter(
-                ConfidenceLog.timestamp < cutoff_date
-            ).delete()
+            # Delete in bounded batches, one transaction each, so readers
+            # aren't blocked behind a single long-running delete
+            deleted_count = 0
+            while True:
+                with self.session_scope(invalidates_stats=True) as db:
+                    batch_count = db.execute(
+                        delete(ConfidenceLog).where(ConfidenceLog.id.in_(old_ids))
+                    ).rowcount
+                deleted_count += batch_count
+                if batch_count < CLEANUP_BATCH_SIZE:
+                    break
             
-            db.commit()
-            logger.info(f"Cleaned up {deleted_count} old confidence log entries")
+            logger.info("Cleaned up %s old confidence log entries", deleted_count)
             return deleted_count
-            
+                
         except SQLAlchemyError as e:
-            logger.error(f"Error cleaning up old entries: {e}")
-            db.rollback()
+            logger.error("Error cleaning up old entries: %s", e)
             raise
-        finally:
-            db.close()
 
 # Global service instance
 confidence_scoring_service = ConfidenceScoringService() 
\ No newline at end of file
@@ -1,12 +1,29 @@
 import os
 from dotenv import load_dotenv
-from openai import OpenAI, APIError, APIConnectionError, RateLimitError, AuthenticationError, NotFoundError, BadRequestError, AsyncOpenAI
-# Removed problematic imports that don't exist in this version
-# from openai.types.responses import ResponseOutputTextDeltaEvent, ResponseDoneEvent, ResponseErrorEvent
-from typing import Tuple, Dict, List, Optional, Any, AsyncGenerator, Awaitable
+from openai import APIError, APIConnectionError, APIStatusError, RateLimitError, AuthenticationError, NotFoundError, BadRequestError, InternalServerError, AsyncOpenAI
+from openai.lib._pydantic import to_strict_json_schema
+from typing import Tuple, Dict, List, Optional, Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Mapping, Sequence
 
+import asyncio
+from contextlib import aclosing
+from functools import lru_cache
+import httpx
 import logging
+import random
+import time
+from types import MappingProxyType
 import json # For parsing in the non-streaming version and CLI
+import orjson
+from cachetools import TLRUCache
+from pydantic import ConfigDict, ValidationError
+
+# Load environment variables from .env file for local development. Deployments inject
+# them directly, so the file is skipped when the key is already set, with APP_ENV=prod,
+# on Kubernetes, or with DISABLE_DOTENV=1. This runs before the app imports below, which
+# read settings at import.
+if (not os.getenv("OPENAI_API_KEY") and os.getenv("APP_ENV", "dev") != "prod"
+        and os.getenv("DISABLE_DOTENV") != "1" and not os.getenv("KUBERNETES_SERVICE_HOST")):
+    load_dotenv()
 
 # Import the Pydantic model for structured responses
 from app.models import StructuredAdvice
@@ -17,27 +34,188 @@ from app.services.prompt_loader import prompt_loader
 # Import the schema validator
 from app.services.schema_validator import schema_validator
 
-# Import the PyBaseball service
-from app.services.pybaseball_service import PyBaseballService
+# SSE frame builders for the streaming response
+from app.services.sse_frames import HEARTBEAT_FRAME, error_frame, sse_frame, text_delta_frame
 
-# Instantiate the PyBaseball service
-pybaseball_service = PyBaseballService()
+# Content-addressed cache of earlier advice
+from app.services.response_cache import response_cache, RESPONSE_CACHE_TTL_SECONDS
+from app.services.rate_limiter import estimate_tokens, rate_limiter
+from app.services.partial_json import JsonFieldStream
 
-# Load environment variables from .env file
-load_dotenv()
+# The app-wide PyBaseball service; the lifespan gives it the pooled HTTP client
+from app.services.pybaseball_service import PyBaseballError, pybaseball_service
 
 logging.getLogger(__name__).addHandler(logging.NullHandler())
 logger = logging.getLogger(__name__)
 
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    logger.error("OPENAI_API_KEY environment variable is not set")
-    raise EnvironmentError("Missing OPENAI_API_KEY")
+# Transient failures (connection errors, 408/409/429 and 5xx) are retried by the SDK
+# with exponential backoff that honours Retry-After.
+OPENAI_MAX_RETRIES = 4
+OPENAI_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+# Opening a stream is retried by get_streaming_response itself so it can tell the
+# client about each attempt; delays back off exponentially up to this cap.
+STREAM_RETRY_MAX_DELAY_SECONDS = 8.0
+
+# Seconds without an OpenAI event before a heartbeat comment is sent, well under
+# the 60s idle timeout of common proxies; 0 disables heartbeats
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+
+# How many OpenAI events may be read ahead of the frames written to the client
+STREAM_READ_AHEAD = 64
+
+# Text deltas arriving within this many milliseconds of the last text_delta frame are
+# merged into the next one, up to STREAM_COALESCE_MAX_CHARS; 0 sends every delta as-is
+STREAM_COALESCE_MS = float(os.getenv("STREAM_COALESCE_MS", "15"))
+STREAM_COALESCE_MAX_CHARS = 512
+
+# Log every stream event with its full payload (STREAM_TRACE=1); off by default since
+# building each event's repr is costly on a token-rate stream
+_TRACE_EVENTS = os.getenv("STREAM_TRACE") == "1"
+
+def _get_api_key() -> str:
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        logger.error("OPENAI_API_KEY environment variable is not set")
+        raise EnvironmentError("Missing OPENAI_API_KEY")
+    return api_key
+
+# Clients are created on first use, so importing this module doesn't require a key
+@lru_cache(maxsize=1)
+def get_async_client() -> AsyncOpenAI:
+    """Shared AsyncOpenAI client used for every OpenAI call in this module."""
+    return AsyncOpenAI(
+        api_key=_get_api_key(),
+        max_retries=OPENAI_MAX_RETRIES,
+        timeout=OPENAI_TIMEOUT,
+        # Large keep-alive pool so concurrent streams reuse TLS connections
+        http_client=httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=512,
+                max_keepalive_connections=256,
+                keepalive_expiry=60.0
+            ),
+            timeout=OPENAI_TIMEOUT
+        )
+    )
+
+@lru_cache(maxsize=1)
+def _get_stream_client() -> AsyncOpenAI:
+    """The shared client with SDK retries disabled, for opening streams."""
+    return get_async_client().with_options(max_retries=0)
+
+async def close_clients() -> None:
+    """Closes the shared OpenAI client's connection pool; call on app shutdown."""
+    if get_async_client.cache_info().currsize:
+        await get_async_client().close()
+    # The stream client shares the same pool
+    get_async_client.cache_clear()
+    _get_stream_client.cache_clear()
+
+async def warm_up_clients() -> None:
+    """
+    Makes one cheap request so the shared pool already holds an open TLS/HTTP2
+    connection when the first user request arrives; failures are only logged.
+    """
+    try:
+        await get_async_client().with_options(max_retries=0, timeout=10.0).models.list()
+        logger.info("OpenAI connection pool warmed up")
+    except Exception as e:
+        logger.warning("OpenAI warm-up request failed: %s", e)
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """
+    Seconds to wait before retrying a failed stream open.
+    Uses the server's Retry-After when it sent one, otherwise jittered exponential backoff.
+    """
+    if isinstance(error, APIStatusError):
+        retry_after = error.response.headers.get("retry-after")
+        try:
+            return min(float(retry_after), STREAM_RETRY_MAX_DELAY_SECONDS)
+        except (TypeError, ValueError):
+            pass
+    return min(0.5 * 2 ** attempt, STREAM_RETRY_MAX_DELAY_SECONDS) * random.uniform(0.75, 1.0)
+
+class _StreamError:
+    """Carries an exception raised while reading the stream over to the consumer."""
+    __slots__ = ("error",)
+    
+    def __init__(self, error: Exception):
+        self.error = error
+
+_STREAM_END = object()
+# Yielded by _with_heartbeats when the flush deadline passes before the next event
+_FLUSH_DUE = object()
+
+async def _with_heartbeats(
+    stream: AsyncIterator[Any],
+    interval: float,
+    flush_deadline: Optional[Callable[[], Optional[float]]] = None
+) -> AsyncGenerator[Any, None]:
+    """
+    Yields the events of `stream`, plus None each time `interval` seconds pass without one
+    (0 disables heartbeats). If `flush_deadline` returns a time.monotonic() deadline,
+    _FLUSH_DUE is yielded once it passes without an event arriving first.
+    
+    A reader task pulls events into a bounded queue, so reading from OpenAI carries on
+    while the consumer is busy writing frames to a slow client, up to STREAM_READ_AHEAD
+    events ahead. Errors from the stream are re-raised here, in the consumer.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_READ_AHEAD)
+    
+    async def read_events() -> None:
+        try:
+            async for event in stream:
+                await queue.put(event)
+        except Exception as e:
+            await queue.put(_StreamError(e))
+        else:
+            await queue.put(_STREAM_END)
+    
+    reader = asyncio.create_task(read_events())
+    heartbeat_at = time.monotonic() + interval if interval > 0 else None
+    try:
+        while True:
+            flush_at = flush_deadline() if flush_deadline is not None else None
+            heartbeat_first = flush_at is None or (heartbeat_at is not None and heartbeat_at <= flush_at)
+            wake_at = heartbeat_at if heartbeat_first else flush_at
+            try:
+                # Cancelling Queue.get on a timeout never loses an item
+                async with asyncio.timeout(None if wake_at is None else wake_at - time.monotonic()):
+                    item = await queue.get()
+            except TimeoutError:
+                if heartbeat_first:
+                    heartbeat_at = time.monotonic() + interval
+                    yield None
+                else:
+                    yield _FLUSH_DUE
+                continue
+            if heartbeat_at is not None:
+                heartbeat_at = time.monotonic() + interval
+            if item is _STREAM_END:
+                return
+            if isinstance(item, _StreamError):
+                raise item.error
+            yield item
+    finally:
+        reader.cancel()
+        # Let the reader finish before the caller closes the stream under it
+        await asyncio.gather(reader, return_exceptions=True)
+
+# JSON schema embedded in the prompt for models without structured outputs; generating it walks the whole model, so do it once
+_ADVICE_SCHEMA = StructuredAdvice.model_json_schema()
 
-# Use AsyncOpenAI for the streaming function
-async_client = AsyncOpenAI(api_key=api_key)
-# Keep synchronous client for the existing non-streaming function
-client = OpenAI(api_key=api_key)
+# Structured-outputs format for the Responses API `text` parameter (its counterpart to
+# Chat Completions' response_format); the API enforces the schema, so the prompt can skip it
+_ADVICE_TEXT_FORMAT = {
+    "format": {
+        "type": "json_schema",
+        "name": "StructuredAdvice",
+        "schema": to_strict_json_schema(StructuredAdvice),
+        "strict": True,
+    }
+}
 
 # Define the default model by checking environment variable first, then fallback
 OPENAI_DEFAULT_MODEL_INTERNAL = os.getenv("OPENAI_DEFAULT_MODEL", "gpt-4.1") # Default model updated to GPT-4.1
@@ -45,8 +223,46 @@ OPENAI_DEFAULT_MODEL_INTERNAL = os.getenv("OPENAI_DEFAULT_MODEL", "gpt-4.1") # D
 # Use the modular prompt system for default instructions
 SYSTEM_DEFAULT_INSTRUCTIONS = prompt_loader.get_system_prompt("default")
 
-# Add this helper function near the top of the file after the imports
-def check_model_compatibility(model: str) -> dict:
+# Known compatibility information, based on documentation and testing as of 2025.
+# Read-only and shared by every request, so callers must not modify the entries.
+_MODEL_COMPATIBILITY: Mapping[str, Mapping[str, bool]] = MappingProxyType({
+    "gpt-4.1": MappingProxyType({
+        "web_search": True,
+        "function_calling": True,
+        "step2_architecture": True,
+        "complex_prompts": True,
+        "structured_outputs": True,
+        "recommended": True
+    }),
+    "gpt-4.1-mini": MappingProxyType({
+        "web_search": True,  # Supports web search but with limitations
+        "function_calling": True,  # Supports function calling but with limitations
+        "step2_architecture": False,  # May struggle with complex system prompts
+        "complex_prompts": False,  # Often has difficulty with complex schemas
+        "structured_outputs": True,
+        "recommended": False
+    }),
+    "gpt-4-turbo": MappingProxyType({
+        "web_search": False,  # Not explicitly designed for web search
+        "function_calling": True,
+        "step2_architecture": True,
+        "complex_prompts": True,
+        "structured_outputs": False,  # json_schema output requires gpt-4o or later
+        "recommended": False  # Deprecated in favor of gpt-4.1
+    })
+})
+
+_UNKNOWN_MODEL_COMPATIBILITY: Mapping[str, bool] = MappingProxyType({
+    "web_search": False,
+    "function_calling": False,
+    "step2_architecture": False,
+    "complex_prompts": False,
+    "structured_outputs": False,
+    "recommended": False,
+    "unknown_model": True
+})
+
+def check_model_compatibility(model: str) -> Mapping[str, bool]:
     """
     Checks if a model is compatible with various OpenAI API features.
     
@@ -54,48 +270,513 @@ def check_model_compatibility(model: str) -> dict:
         model: The model name to check
         
     Returns:
-        dict: Compatibility information for various features
+        Mapping: Compatibility information for various features (read-only)
     """
-    # Define known compatibility information
-    # Based on documentation and testing as of 2025
-    compatibility = {
-        "gpt-4.1": {
-            "web_search": True,
-            "function_calling": True,
-            "step2_architecture": True,
-            "complex_prompts": True,
-            "recommended": True
-        },
-        "gpt-4.1-mini": {
-            "web_search": True,  # Supports web search but with limitations
-            "function_calling": True,  # Supports function calling but with limitations
-            "step2_architecture": False,  # May struggle with complex system prompts
-            "complex_prompts": False,  # Often has difficulty with complex schemas
-            "recommended": False
-        },
-        "gpt-4-turbo": {
-            "web_search": False,  # Not explicitly designed for web search
-            "function_calling": True,
-            "step2_architecture": True,
-            "complex_prompts": True,
-            "recommended": False  # Deprecated in favor of gpt-4.1
+    model_compat = _MODEL_COMPATIBILITY.get(model, _UNKNOWN_MODEL_COMPATIBILITY)
+    
+    if model_compat is _UNKNOWN_MODEL_COMPATIBILITY:
+        logger.warning("Unknown model: %s. Compatibility information may not be accurate.", model)
+    
+    return model_compat
+
+class _SchemaConformingAdvice(StructuredAdvice):
+    """
+    StructuredAdvice held to the rules of schemas/response.schema.json: no extra keys
+    and no type coercion. Anything this accepts also passes schema_validator, so
+    well-formed responses are parsed and checked in a single pass.
+    """
+    model_config = ConfigDict(extra="forbid", strict=True)
+
+def _validate_advice_json(text: str) -> Optional[StructuredAdvice]:
+    """
+    Validates model output as StructuredAdvice JSON.
+    
+    Returns:
+        The parsed advice, or None if the text isn't advice JSON
+    """
+    try:
+        # Parsing and validation both happen in pydantic-core; whitespace around the JSON is fine
+        return StructuredAdvice.model_validate_json(text)
+    except ValidationError:
+        pass
+    
+    # Some responses use {"message": ..., "confidence": ...}; map them onto the schema
+    try:
+        json_content = orjson.loads(text)
+    except orjson.JSONDecodeError:
+        return None
+    if not isinstance(json_content, dict) or 'message' not in json_content or 'main_advice' in json_content:
+        return None
+    json_content['main_advice'] = json_content['message']
+    # Keep the confidence if present
+    if 'confidence' in json_content and 'confidence_score' not in json_content:
+        json_content['confidence_score'] = json_content['confidence']
+    try:
+        return StructuredAdvice.model_validate(json_content)
+    except ValidationError:
+        return None
+
+# Tool definitions, built once at import and shared by every request
+_WEB_SEARCH_TOOL = {"type": "web_search"}
+_PYBASEBALL_TOOLS = [
+    {
+        "type": "function",
+        "name": "get_mlb_player_stats",
+        "description": "Get season statistics for a specific MLB player",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "player_name": {
+                    "type": "string",
+                    "description": "Full name of the player (e.g., 'Shohei Ohtani')"
+                },
+                "year": {
+                    "type": "integer",
+                    "description": "Season year (optional, defaults to current year)"
+                }
+            },
+            "required": ["player_name"]
+        }
+    },
+    {
+        "type": "function",
+        "name": "get_mlb_standings",
+        "description": "Get current MLB standings by division",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "year": {
+                    "type": "integer",
+                    "description": "Season year (optional)"
+                }
+            }
+        }
+    },
+    {
+        "type": "function",
+        "name": "search_mlb_players",
+        "description": "Search for MLB players by partial name",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "search_term": {
+                    "type": "string",
+                    "description": "Partial name to search for"
+                }
+            },
+            "required": ["search_term"]
         }
     }
+]
+_TOOLS_WITH_SEARCH = [_WEB_SEARCH_TOOL, *_PYBASEBALL_TOOLS]
+
+def _prompt_cache_key(model: str, prompt_type: str, use_step2_architecture: bool, enable_web_search: bool) -> str:
+    """
+    Groups requests that share the same tools and system prompt, so OpenAI routes them
+    to the same prompt cache and reuses the cached prefix instead of reprocessing it.
+    Sent in extra_body: the pinned SDK's `responses.create` has no prompt_cache_key argument.
+    """
+    return f"{prompt_type}:{int(use_step2_architecture)}:{int(enable_web_search)}:{model}"
+
+# PyBaseball tool name -> call taking the parsed arguments; each passes on only the
+# arguments its tool declares. The service is looked up per call, not bound here.
+_TOOL_DISPATCH: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]] = {
+    "get_mlb_player_stats": lambda args: pybaseball_service.get_player_stats(args.get("player_name"), args.get("year")),
+    "get_mlb_standings": lambda args: pybaseball_service.get_mlb_standings(args.get("year")),
+    "search_mlb_players": lambda args: pybaseball_service.search_players(args.get("search_term")),
+}
+
+# Seconds a tool result is reused for the same arguments: standings and player searches
+# barely move within an hour, season stats can change during games
+_TOOL_CACHE_TTL_SECONDS: Dict[str, float] = {
+    "get_mlb_player_stats": 300,
+    "get_mlb_standings": 3600,
+    "search_mlb_players": 3600,
+}
+_TOOL_CACHE_MAX_ENTRIES = 1024
+
+# (tool name, canonical JSON of its arguments) -> result
+_tool_cache: TLRUCache = TLRUCache(
+    maxsize=_TOOL_CACHE_MAX_ENTRIES,
+    ttu=lambda key, value, now: now + _TOOL_CACHE_TTL_SECONDS[key[0]],
+    timer=time.monotonic
+)
+
+async def _run_tool(name: Optional[str], args: Dict[str, Any]) -> Any:
+    """Runs the named PyBaseball tool; None for tools this backend doesn't implement."""
+    call = _TOOL_DISPATCH.get(name)
+    if call is None:
+        return None
+    key = (name, orjson.dumps(args, option=orjson.OPT_SORT_KEYS))
+    result = _tool_cache.get(key)
+    if result is not None:
+        return result
+    result = await call(args)
+    # PyBaseballService reports failures as a PyBaseballError result; those aren't worth keeping
+    if result is not None and not isinstance(result, PyBaseballError):
+        _tool_cache[key] = result
+    return result
+
+_NO_FRAMES: Tuple[bytes, ...] = ()
+
+# Status updates that never vary, serialized once at import
+_SSE_CREATED = sse_frame("status_update", {'status': 'created', 'message': 'Connecting...'})
+_SSE_WEB_SEARCH_SEARCHING = sse_frame("status_update", {'status': 'web_search_searching', 'message': 'Searching the web...'})
+_SSE_WEB_SEARCH_COMPLETED = sse_frame("status_update", {'status': 'web_search_completed', 'message': 'Web search completed.'})
+_SSE_WEB_SEARCH_STARTED = sse_frame("status_update", {'status': 'web_search_started', 'message': 'Starting web search...'})
+_SSE_MESSAGE_START = sse_frame("status_update", {'status': 'message_start', 'message': 'Assistant is typing...'})
+_SSE_MESSAGE_GENERATING_DONE = sse_frame("status_update", {'status': 'message_generating_done', 'message': 'Finalizing response...'})
+
+class _StreamState:
+    """Per-request state shared by the stream event handlers."""
+    __slots__ = (
+        "model", "content_parts", "content_length", "response_id", "event_count",
+        "func_call_name", "func_call_args_parts", "finished", "cache_key", "cache_ttl",
+        "coalesce_window", "pending_deltas", "pending_length", "last_flush", "tool_calls",
+        "advice_stream"
+    )
     
-    # Get compatibility for the requested model
-    model_compat = compatibility.get(model, {
-        "web_search": False,
-        "function_calling": False,
-        "step2_architecture": False,
-        "complex_prompts": False,
-        "recommended": False,
-        "unknown_model": True
-    })
+    def __init__(self, model: str, cache_key: Optional[str] = None, cache_ttl: int = 0,
+                 coalesce_ms: float = 0, partial_advice: bool = False):
+        self.model = model
+        # Where to store the final advice; None when this response isn't cached
+        self.cache_key = cache_key
+        self.cache_ttl = cache_ttl
+        # Deltas are collected in a list and joined once on completion;
+        # repeated str += would copy the whole response on every delta
+        self.content_parts: List[str] = []
+        self.content_length = 0
+        self.response_id: Optional[str] = None
+        self.event_count = 0
+        # State for new-style function-call events (March 2025 API update)
+        self.func_call_name: Optional[str] = None    # Captures the tool name
+        self.func_call_args_parts: List[str] = []    # Argument chunks, joined once complete
+        # Set by handlers for terminal events; the stream loop stops after them
+        self.finished = False
+        # Deltas not yet sent, batched into one text_delta frame per coalesce window.
+        # last_flush starts in the past so the first token goes out immediately.
+        self.coalesce_window = coalesce_ms / 1000
+        self.pending_deltas: List[str] = []
+        self.pending_length = 0
+        self.last_flush = float("-inf")
+        # Tool calls running in the background, as (tool name, task), until their results are sent
+        self.tool_calls: List[Tuple[str, asyncio.Task]] = []
+        # Pulls main_advice out of the JSON as it streams, when partial_advice frames were asked for
+        self.advice_stream = JsonFieldStream("main_advice") if partial_advice else None
+
+def _flush_deltas(state: _StreamState) -> Sequence[bytes]:
+    """
+    Returns the pending text deltas as a single text_delta frame, if there are any,
+    followed by a partial_advice frame with any new main_advice text they complete.
+    """
+    if not state.pending_deltas:
+        return _NO_FRAMES
+    pending = state.pending_deltas
+    text = pending[0] if len(pending) == 1 else "".join(pending)
+    state.pending_deltas = []
+    state.pending_length = 0
+    state.last_flush = time.monotonic()
+    advice_stream = state.advice_stream
+    if advice_stream is not None and not advice_stream.done:
+        advice_text = advice_stream.feed(text)
+        if advice_text:
+            return (text_delta_frame(text), _partial_advice_frame(advice_text))
+    return (text_delta_frame(text),)
+
+def _partial_advice_frame(text: str) -> bytes:
+    return sse_frame("partial_advice", {'field': 'main_advice', 'delta': text})
+
+def _start_tool(state: _StreamState, name: Optional[str], args: Dict[str, Any]) -> None:
+    """
+    Starts a tool call without waiting for it, so OpenAI events (and other tool calls)
+    keep flowing while it runs; its result is sent once it finishes.
+    """
+    if name in _TOOL_DISPATCH:
+        state.tool_calls.append((name, asyncio.create_task(_run_tool(name, args))))
+
+def _tool_frames(name: str, task: asyncio.Task) -> Sequence[bytes]:
+    """The frames reporting a finished tool call's result or error."""
+    try:
+        result = task.result()
+    except Exception as e:
+        logger.error("Error executing tool %s: %s", name, e)
+        return (sse_frame("tool_error", {'tool': name, 'error': str(e)}),)
+    if result is None:
+        return _NO_FRAMES
+    logger.info("Tool result for %s: %s...", name, str(result)[:100])
+    # Stream the tool result back to the client
+    return (
+        sse_frame("tool_result", {'tool': name, 'result': result}),
+        sse_frame("status_update", {'status': 'function_call_completed', 'message': f'{name} completed.'})
+    )
+
+def _finished_tool_frames(state: _StreamState) -> List[bytes]:
+    """Frames for the tool calls that have finished so far, without waiting on the rest."""
+    frames: List[bytes] = []
+    running = []
+    for name, task in state.tool_calls:
+        if task.done():
+            frames.extend(_tool_frames(name, task))
+        else:
+            running.append((name, task))
+    state.tool_calls = running
+    return frames
+
+async def _wait_for_tools(state: _StreamState) -> AsyncGenerator[bytes, None]:
+    """Yields the remaining tool results in completion order, with heartbeats while waiting."""
+    names = {task: name for name, task in state.tool_calls}
+    pending = set(names)
+    while pending:
+        done, pending = await asyncio.wait(
+            pending, timeout=STREAM_HEARTBEAT_SECONDS or None, return_when=asyncio.FIRST_COMPLETED
+        )
+        if not done:
+            yield HEARTBEAT_FRAME
+        for task in done:
+            for frame in _tool_frames(names[task], task):
+                yield frame
+        state.tool_calls = [(names[task], task) for task in pending]
+
+# Stream event handlers. Each takes the event and the request's _StreamState and
+# returns the SSE frames to send, if any; _STREAM_EVENT_HANDLERS maps event types to them.
+
+async def _on_created(event, state: _StreamState) -> Sequence[bytes]:
+    # Capture response ID from the first event
+    response = getattr(event, 'response', None)
+    if response is not None and hasattr(response, 'id'):
+        response_id = state.response_id = response.id
+        logger.info("Response ID captured: %s", response_id)
+        return (sse_frame("status_update", {'status': 'created', 'message': 'Connecting...', 'response_id': response_id}),)
+    logger.info("Response created event received")
+    return (_SSE_CREATED,)
+
+async def _on_text_delta(event, state: _StreamState) -> Sequence[bytes]:
+    delta = event.delta
+    state.content_parts.append(delta)
+    state.content_length += len(delta)
+    # Only log the first few deltas to avoid overwhelming logs
+    if state.content_length < 200 and logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Text delta received: '%s'", delta)
+    state.pending_deltas.append(delta)
+    state.pending_length += len(delta)
+    if (state.pending_length >= STREAM_COALESCE_MAX_CHARS
+            or time.monotonic() - state.last_flush >= state.coalesce_window):
+        return _flush_deltas(state)
+    return _NO_FRAMES
+
+async def _on_web_search_searching(event, state: _StreamState) -> Sequence[bytes]:
+    logger.info("Web search in progress")
+    return (_SSE_WEB_SEARCH_SEARCHING,)
+
+async def _on_web_search_completed(event, state: _StreamState) -> Sequence[bytes]:
+    logger.info("Web search completed")
+    return (_SSE_WEB_SEARCH_COMPLETED,)
+
+async def _on_output_item_added(event, state: _StreamState) -> Sequence[bytes]:
+    item_type = getattr(getattr(event, 'item', None), 'type', None)
+    logger.info("Output item added: %s", item_type)
+    if item_type == 'web_search_call':
+        return (_SSE_WEB_SEARCH_STARTED,)
+    if item_type == 'message':
+        return (_SSE_MESSAGE_START,)
+    logger.info("Unknown output item type: %s", item_type)
+    return _NO_FRAMES
+
+async def _on_output_item_done(event, state: _StreamState) -> Sequence[bytes]:
+    item_type = getattr(getattr(event, 'item', None), 'type', None)
+    logger.info("Output item done: %s", item_type)
+    if item_type == 'message':
+        # This event might be too quick before response_complete, but can be used.
+        return (_SSE_MESSAGE_GENERATING_DONE,)
+    logger.debug("OpenAI response output item done (type: %s): %s", item_type, event)
+    return _NO_FRAMES
+
+async def _on_annotation_added(event, state: _StreamState) -> Sequence[bytes]:
+    annotation_title = getattr(getattr(event, 'annotation', None), 'title', 'citation')
+    logger.info("Annotation added: %s", annotation_title)
+    return (sse_frame("status_update", {'status': 'annotation_found', 'message': f'Processing {annotation_title}...'}),)
+
+def _log_only(message: str, include_event: bool = False):
+    """Handler for events that are only logged."""
+    async def handler(event, state: _StreamState) -> Sequence[bytes]:
+        if include_event:
+            # The event repr can be large, so it's only logged at DEBUG
+            logger.debug(message, event)
+        else:
+            logger.info(message)
+        return _NO_FRAMES
+    return handler
+
+# --------------------------------------------------------------
+# NEW‑STYLE FUNCTION CALL EVENTS  (Responses API ≥ 2025‑03)
+# --------------------------------------------------------------
+async def _on_function_call_name(event, state: _StreamState) -> Sequence[bytes]:
+    # Capture the name of the function/tool being invoked
+    state.func_call_name = getattr(event, "name", None) or getattr(
+        getattr(event, "function_call", None), "name", None
+    )
+    logger.info("Function call name: %s", state.func_call_name)
+    if state.func_call_name:
+        return (sse_frame("status_update", {'status': 'function_call_started', 'message': f'Calling {state.func_call_name}...'}),)
+    return _NO_FRAMES
+
+async def _on_function_call_arguments_delta(event, state: _StreamState) -> Sequence[bytes]:
+    # Arguments come in piecemeal; accumulate them
+    delta_args = event.delta
+    state.func_call_args_parts.append(delta_args)
+    logger.debug("Function call arguments delta: %s", delta_args)
+    return _NO_FRAMES
+
+async def _on_function_call_arguments_done(event, state: _StreamState) -> Sequence[bytes]:
+    # All arguments received – parse and execute the tool
+    func_call_name = state.func_call_name
+    args_json = "".join(state.func_call_args_parts)
+    logger.info("Function call arguments complete: %s", args_json)
+    try:
+        args = orjson.loads(args_json or "{}")
+    except orjson.JSONDecodeError as e:
+        logger.error("Failed to parse function‑call arguments: %s", e)
+        args = {}
     
-    if model_compat.get("unknown_model", False):
-        logger.warning(f"Unknown model: {model}. Compatibility information may not be accurate.")
+    # Reset buffers for potential subsequent calls
+    state.func_call_name = None
+    state.func_call_args_parts = []
     
-    return model_compat
+    # Route to appropriate PyBaseball method
+    _start_tool(state, func_call_name, args)
+    return _NO_FRAMES
+
+# Legacy/old-style function-call event handlers:
+async def _on_legacy_function_call(event, state: _StreamState) -> Sequence[bytes]:
+    # Handle function calls to PyBaseball service
+    if not hasattr(event, 'function_call'):
+        return _NO_FRAMES
+    func_call = event.function_call
+    func_name = func_call.name if hasattr(func_call, 'name') else ''
+    logger.info("Legacy function call: %s", func_name)
+    return (sse_frame("status_update", {'status': 'function_call_started', 'message': f'Calling {func_name}...'}),)
+
+async def _on_legacy_function_call_done(event, state: _StreamState) -> Sequence[bytes]:
+    # Handle completed function calls to PyBaseball service
+    if not hasattr(event, 'function_call'):
+        return _NO_FRAMES
+    func_call = event.function_call
+    func_name = func_call.name if hasattr(func_call, 'name') else ''
+    args = orjson.loads(func_call.arguments) if hasattr(func_call, 'arguments') else {}
+    logger.info("Legacy function call completed: %s with args: %s", func_name, args)
+    
+    # Route to appropriate PyBaseball function
+    _start_tool(state, func_name, args)
+    return _NO_FRAMES
+
+async def _on_completed(event, state: _StreamState) -> Sequence[bytes]:
+    logger.info("Response completed, validating final content")
+    state.finished = True
+    accumulated_content = "".join(state.content_parts)
+    try:
+        # The common case, advice JSON exactly as the schema asks, is parsed and validated at once
+        try:
+            parsed_advice = _SchemaConformingAdvice.model_validate_json(accumulated_content)
+        except ValidationError:
+            parsed_advice = None
+        
+        if parsed_advice is None:
+            # Step 6: Schema validation before finalizing response
+            is_valid, error_msg = schema_validator.validate_streaming_chunk(
+                accumulated_content, is_complete=True
+            )
+            
+            if not is_valid:
+                logger.warning("Schema validation failed: %s", error_msg)
+                # Create fallback response using schema validator
+                fallback_data = schema_validator.create_fallback_response(
+                    accumulated_content, error_msg
+                )
+                final_data = {
+                    'status': 'complete',
+                    'final_json': fallback_data,
+                    'response_id': state.response_id,
+                    'validation_error': error_msg
+                }
+                return (sse_frame("response_complete", final_data),)
+            
+            # Parse the validated content, falling back to plain text
+            parsed_advice = _validate_advice_json(accumulated_content)
+            if parsed_advice is None:
+                logger.info("Response is not StructuredAdvice JSON; using it as plain text")
+                parsed_advice = StructuredAdvice(
+                    main_advice=accumulated_content.strip(),
+                    model_identifier=state.model
+                )
+        
+        # A validated StructuredAdvice always dumps to schema-conformant JSON,
+        # so the dict isn't run through the schema a second time
+        logger.info("Schema validation passed, sending final response")
+        # Include response_id in the successful final response
+        final_data = {
+            'status': 'complete', 
+            'final_json': parsed_advice.model_dump(),
+            'response_id': state.response_id
+        }
+        if state.cache_key:
+            await response_cache.set(state.cache_key, parsed_advice, state.cache_ttl)
+        
+        return (sse_frame("response_complete", final_data),)
+        
+    except Exception as e:
+        logger.error("Failed to parse final response: %s", e)
+        fallback_advice = schema_validator.create_fallback_response(
+            accumulated_content.strip() or "No response received",
+            f"Parse error: {e}"
+        )
+        final_data = {
+            'status': 'complete',
+            'final_json': fallback_advice,
+            'response_id': state.response_id,
+            'parse_error': str(e)
+        }
+        return (sse_frame("response_complete", final_data),)
+
+async def _on_error(event, state: _StreamState) -> Sequence[bytes]:
+    # Error or failure events
+    state.finished = True
+    err_msg = getattr(event, 'error', None)
+    if err_msg is None and hasattr(event, 'message'): # Check for message attribute if error is not present
+        err_msg = event.message
+    err_text = str(err_msg) if err_msg else "Unknown error" # Ensure err_text is always a string
+    logger.error("OpenAI API error: %s", err_text)
+    return (error_frame("API_ERROR", err_text),)
+
+async def _on_unknown(event, state: _StreamState) -> Sequence[bytes]:
+    evt_type = getattr(event, 'type', None)
+    logger.warning("Unhandled event type: %s, Event: %s", evt_type, event)
+    # Try to handle the unknown event generically
+    return (sse_frame("status_update", {'status': 'unknown_event', 'message': f'Received event: {evt_type}'}),)
+
+# One dict lookup per event instead of walking an if/elif chain of type comparisons
+_STREAM_EVENT_HANDLERS = {
+    "response.created": _on_created,
+    "response.in_progress": _log_only("Response in progress event"),
+    "response.output_text.delta": _on_text_delta,
+    "response.output_text.done": _log_only("Output text completed"),
+    "response.output_text.annotation.added": _on_annotation_added,
+    "response.output_item.added": _on_output_item_added,
+    "response.output_item.done": _on_output_item_done,
+    "response.content_part.added": _log_only("Content part added: %s", include_event=True),
+    "response.content_part.done": _log_only("Content part done: %s", include_event=True),
+    "response.web_search_call.searching": _on_web_search_searching,
+    "response.web_search_call.in_progress": _log_only("Web search call in progress"),
+    "response.web_search_call.completed": _on_web_search_completed,
+    "response.function_call.name": _on_function_call_name,
+    "response.function_call_name": _on_function_call_name,
+    "response.function_call_arguments.delta": _on_function_call_arguments_delta,
+    "response.function_call_arguments.done": _on_function_call_arguments_done,
+    "response.function_call": _on_legacy_function_call,
+    "response.function_call.done": _on_legacy_function_call_done,
+    "response.completed": _on_completed,
+    "response.error": _on_error,
+    "response.failed": _on_error,
+}
 
 async def get_streaming_response(
     prompt: str = None,
@@ -106,8 +787,11 @@ async def get_streaming_response(
     prompt_type: str = "default",
     conversation_messages: List = None,
     previous_response_id: str = None,
-    use_step2_architecture: bool = True
-) -> AsyncGenerator[str, None]:
+    use_step2_architecture: bool = True,
+    cache_ttl: int = RESPONSE_CACHE_TTL_SECONDS,
+    coalesce_ms: float = STREAM_COALESCE_MS,
+    partial_advice: bool = False
+) -> AsyncGenerator[bytes, None]:
     """
     Gets a streaming response from OpenAI's Responses API with structured JSON output.
     
@@ -117,27 +801,37 @@ async def get_streaming_response(
         previous_response_id: OpenAI response ID for conversation continuity
         prompt_type: Type of prompt to use from config ("default", "detailed", "baseball", "football", "basketball")
         use_step2_architecture: Whether to use Step 2 slim prompt + assistant messages (default: True)
+        cache_ttl: Seconds to reuse this advice for identical requests; 0 disables the cache.
+            Requests continuing a conversation via previous_response_id are never cached.
+        coalesce_ms: Window for merging text deltas into fewer text_delta frames;
+            0 sends one frame per delta for the lowest latency.
+        partial_advice: Also send partial_advice frames carrying the decoded main_advice
+            text as it streams, so clients can show it before the JSON is complete.
     
     Yields:
-        str: Event-formatted chunks containing both text and structured JSON deltas.
+        bytes: SSE frames containing both text and structured JSON deltas.
     """
     try:
         # Check model compatibility
         model_compat = check_model_compatibility(model)
-        logger.info(f"Model compatibility check for {model}: {model_compat}")
+        logger.debug("Model compatibility check for %s: %s", model, model_compat)
         
         # Warn about potential compatibility issues
         if not model_compat.get("recommended", False):
-            logger.warning(f"Model {model} is not recommended for production use")
+            logger.warning("Model %s is not recommended for production use", model)
             
         if enable_web_search and not model_compat.get("web_search", False):
-            logger.warning(f"Web search may not be fully supported by model {model}")
+            logger.warning("Web search may not be fully supported by model %s", model)
             
         if use_step2_architecture and not model_compat.get("step2_architecture", False):
-            logger.warning(f"Step 2 architecture may not be fully supported by model {model}")
-            logger.info(f"Automatically adjusting to use simpler prompt architecture for {model}")
+            logger.warning("Step 2 architecture may not be fully supported by model %s", model)
+            logger.info("Automatically adjusting to use simpler prompt architecture for %s", model)
             use_step2_architecture = False  # Fall back to simpler architecture
         
+        # Let the API enforce the advice schema where supported; otherwise spell it out in the prompt
+        structured_outputs = model_compat.get("structured_outputs", False)
+        prompt_schema = None if structured_outputs else _ADVICE_SCHEMA
+        
         # Get appropriate system instructions
         if instructions is None:
             instructions = prompt_loader.get_system_prompt(prompt_type, use_slim_prompt=use_step2_architecture)
@@ -164,7 +858,7 @@ async def get_streaming_response(
                 api_input = prompt_loader.build_conversation_messages(
                     user_prompt=user_prompt,
                     system_prompt=instructions,
-                    schema=StructuredAdvice.model_json_schema(),
+                    schema=prompt_schema,
                     enable_web_search=enable_web_search,
                     use_slim_prompt=True
                 )
@@ -178,7 +872,7 @@ async def get_streaming_response(
                 api_input = prompt_loader.build_conversation_messages(
                     user_prompt=prompt,
                     system_prompt=instructions,
-                    schema=StructuredAdvice.model_json_schema(),
+                    schema=prompt_schema,
                     enable_web_search=enable_web_search,
                     use_slim_prompt=True
                 )
@@ -187,83 +881,26 @@ async def get_streaming_response(
                 full_prompt = prompt_loader.build_full_prompt(
                     user_prompt=prompt,
                     system_prompt=instructions,
-                    schema=StructuredAdvice.model_json_schema(),
+                    schema=prompt_schema,
                     enable_web_search=enable_web_search
                 )
                 api_input = full_prompt
         
-        logger.info(f"Streaming request to OpenAI Responses API model: {model}")
-        logger.info(f"Using previous_response_id: {previous_response_id is not None}")
-        logger.info(f"Using Step 2 architecture: {use_step2_architecture}")
+        logger.info("Streaming request to OpenAI Responses API model: %s", model)
+        logger.info("Using previous_response_id: %s", previous_response_id is not None)
+        logger.info("Using Step 2 architecture: %s", use_step2_architecture)
         
-        # Log the API input structure for debugging
-        if isinstance(api_input, list):
-            logger.info(f"API input is a list with {len(api_input)} items")
-            for i, item in enumerate(api_input):
-                logger.info(f"API input item {i}: {str(item)[:100]}...")
-        else:
-            logger.info(f"API input is a string: {str(api_input)[:100]}...")
+        # Log the API input structure for debugging; str() of the prompt is costly, so only when asked
+        if logger.isEnabledFor(logging.DEBUG):
+            if isinstance(api_input, list):
+                logger.debug("API input is a list with %s items", len(api_input))
+                for i, item in enumerate(api_input):
+                    logger.debug("API input item %s: %s...", i, str(item)[:100])
+            else:
+                logger.debug("API input is a string: %s...", str(api_input)[:100])
         
-        # Prepare tools including PyBaseball integration
-        tools = []
-
-        # Add web search if enabled
-        if enable_web_search:
-            tools.append({
-                "type": "web_search"
-            })
-
-        # Add PyBaseball tools
-        tools.extend([
-            {
-                "type": "function",
-                "name": "get_mlb_player_stats",
-                "description": "Get season statistics for a specific MLB player",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "player_name": {
-                            "type": "string",
-                            "description": "Full name of the player (e.g., 'Shohei Ohtani')"
-                        },
-                        "year": {
-                            "type": "integer",
-                            "description": "Season year (optional, defaults to current year)"
-                        }
-                    },
-                    "required": ["player_name"]
-                }
-            },
-            {
-                "type": "function",
-                "name": "get_mlb_standings",
-                "description": "Get current MLB standings by division",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "year": {
-                            "type": "integer",
-                            "description": "Season year (optional)"
-                        }
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "name": "search_mlb_players",
-                "description": "Search for MLB players by partial name",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "search_term": {
-                            "type": "string",
-                            "description": "Partial name to search for"
-                        }
-                    },
-                    "required": ["search_term"]
-                }
-            }
-        ])
+        # Web search (if enabled) plus the PyBaseball tools
+        tools = _TOOLS_WITH_SEARCH if enable_web_search else _PYBASEBALL_TOOLS
         
         # Build the API call parameters
         api_params = {
@@ -274,9 +911,13 @@ async def get_streaming_response(
             "temperature": 0,  # Set temperature to 0 for deterministic responses
         }
         
-        # Add tools if there are any
-        if tools:
-            api_params["tools"] = tools
+        api_params["tools"] = tools
+        api_params["extra_body"] = {
+            "prompt_cache_key": _prompt_cache_key(model, prompt_type, use_step2_architecture, enable_web_search)
+        }
+        
+        if structured_outputs:
+            api_params["text"] = _ADVICE_TEXT_FORMAT
         
         # Add previous response ID if provided
         if previous_response_id:
@@ -287,501 +928,255 @@ async def get_streaming_response(
             api_params["instructions"] = instructions
         
         # Log the final API parameters for debugging
-        logger.info(f"API parameters: model={model}, max_tokens={max_tokens}, tools={len(tools)}")
+        logger.info("API parameters: model=%s, max_tokens=%s, tools=%s", model, max_tokens, len(tools))
         
-        # Use the correct Responses API call
-        response = await async_client.responses.create(**api_params)
+        # Replay identical earlier requests from the cache. Continuations depend on
+        # server-side conversation state, so they always go to OpenAI.
+        cache_key = None
+        if cache_ttl > 0 and not previous_response_id:
+            cache_key = response_cache.make_key(api_params)
+            cached_advice = await response_cache.get(cache_key)
+            if cached_advice is not None:
+                logger.info("Serving cached advice for %s", cache_key)
+                yield text_delta_frame(cached_advice.model_dump_json())
+                if partial_advice:
+                    yield _partial_advice_frame(cached_advice.main_advice)
+                yield sse_frame("response_complete", {
+                    'status': 'complete',
+                    'final_json': cached_advice.model_dump(),
+                    'response_id': None,
+                    'cached': True
+                })
+                return
         
-        accumulated_content = ""
-        response_id_captured = None
-        event_count = 0
+        # Use the correct Responses API call. Nothing has been streamed from OpenAI yet,
+        # so transient failures are safe to retry; a retry frame lets the client keep waiting.
+        for attempt in range(OPENAI_MAX_RETRIES + 1):
+            try:
+                await rate_limiter.acquire(estimate_tokens(api_params))
+                response = await _get_stream_client().responses.create(**api_params)
+                break
+            except (APIConnectionError, RateLimitError, InternalServerError) as e:
+                if attempt == OPENAI_MAX_RETRIES:
+                    raise
+                delay = _retry_delay(e, attempt)
+                logger.warning("Opening stream failed (%s), retrying in %.1fs", type(e).__name__, delay)
+                yield sse_frame("retry", {'attempt': attempt + 1, 'delay': round(delay, 2), 'reason': type(e).__name__})
+                await asyncio.sleep(delay)
         
-        # ------------------------------------------------------------------
-        # State for new-style function-call events (March 2025 API update)
-        # ------------------------------------------------------------------
-        func_call_name: Optional[str] = None          # Captures the tool name
-        func_call_args_buffer: str = ""               # Accumulates argument chunks
-
-        async for event in response:
-            event_count += 1
-            # Log every event for better debugging
-            logger.info(f"Event #{event_count} type: {getattr(event, 'type', 'unknown')}, Event data: {event}")
-            
-            evt_type = getattr(event, 'type', None)
-
-            # Capture response ID from the first event
-            if evt_type == "response.created" and hasattr(event, 'response') and hasattr(event.response, 'id'):
-                response_id_captured = event.response.id
-                logger.info(f"Response ID captured: {response_id_captured}")
-                yield f"event: status_update\ndata: {json.dumps({'status': 'created', 'message': 'Connecting...', 'response_id': response_id_captured})}\n\n"
-                continue
-
-            if evt_type == "response.web_search_call.searching":
-                logger.info("Web search in progress")
-                yield f"event: status_update\ndata: {json.dumps({'status': 'web_search_searching', 'message': 'Searching the web...'})}\n\n"
-            elif evt_type == "response.output_text.delta":
-                delta = event.delta
-                accumulated_content += delta
-                # Only log the first few deltas to avoid overwhelming logs
-                if len(accumulated_content) < 200:
-                    logger.info(f"Text delta received: '{delta}'")
-                elif event_count % 10 == 0:
-                    logger.info(f"Text delta milestone: {len(accumulated_content)} chars accumulated")
-                yield f"event: text_delta\ndata: {json.dumps({'delta': delta})}\n\n"
-            elif evt_type == "response.output_text.done":
-                logger.info("Output text completed")
-                continue
-            elif evt_type == "response.created":
-                logger.info("Response created event received")
-                yield f"event: status_update\ndata: {json.dumps({'status': 'created', 'message': 'Connecting...'})}\n\n"
-            elif evt_type == "response.in_progress":
-                logger.info("Response in progress event")
-                continue
-            elif evt_type == "response.output_item.added":
-                item_type = getattr(getattr(event, 'item', None), 'type', None)
-                logger.info(f"Output item added: {item_type}")
-                if item_type == 'web_search_call':
-                    yield f"event: status_update\ndata: {json.dumps({'status': 'web_search_started', 'message': 'Starting web search...'})}\n\n"
-                elif item_type == 'message':
-                    yield f"event: status_update\ndata: {json.dumps({'status': 'message_start', 'message': 'Assistant is typing...'})}\n\n"
-                else:
-                    logger.info(f"Unknown output item type: {item_type}")
-                continue
-            elif evt_type == "response.web_search_call.in_progress":
-                logger.info("Web search call in progress")
-                continue
-            elif evt_type == "response.web_search_call.completed":
-                logger.info("Web search completed")
-                yield f"event: status_update\ndata: {json.dumps({'status': 'web_search_completed', 'message': 'Web search completed.'})}\n\n"
-
-            # --------------------------------------------------------------
-            # NEW‑STYLE FUNCTION CALL EVENTS  (Responses API ≥ 2025‑03)
-            # --------------------------------------------------------------
-            elif evt_type in ("response.function_call.name", "response.function_call_name"):
-                # Capture the name of the function/tool being invoked
-                func_call_name = getattr(event, "name", None) or getattr(
-                    getattr(event, "function_call", None), "name", None
-                )
-                logger.info(f"Function call name: {func_call_name}")
-                if func_call_name:
-                    yield (
-                        "event: status_update\n"
-                        f"data: {json.dumps({'status': 'function_call_started', 'message': f'Calling {func_call_name}...'})}\n\n"
-                    )
-                continue
-
-            elif evt_type == "response.function_call_arguments.delta":
-                # Arguments come in piecemeal; accumulate them
-                delta_args = getattr(event, "delta", "")
-                func_call_args_buffer += delta_args
-                logger.info(f"Function call arguments delta: {delta_args}")
-                continue
-
-            elif evt_type == "response.function_call_arguments.done":
-                # All arguments received – parse and execute the tool
-                logger.info(f"Function call arguments complete: {func_call_args_buffer}")
-                try:
-                    args = json.loads(func_call_args_buffer or "{}")
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse function‑call arguments: {e}")
-                    args = {}
-
-                # Route to appropriate PyBaseball method
-                result = None
-                try:
-                    if func_call_name == "get_mlb_player_stats":
-                        result = await pybaseball_service.get_player_stats(
-                            args.get("player_name"), args.get("year")
-                        )
-                    elif func_call_name == "get_mlb_standings":
-                        result = await pybaseball_service.get_mlb_standings(
-                            args.get("year")
-                        )
-                    elif func_call_name == "search_mlb_players":
-                        result = await pybaseball_service.search_players(
-                            args.get("search_term")
-                        )
-
-                    if result is not None:
-                        logger.info(f"Tool result for {func_call_name}: {str(result)[:100]}...")
-                        # Stream the tool result back to the client
-                        yield (
-                            "event: tool_result\n"
-                            f"data: {json.dumps({'tool': func_call_name, 'result': result})}\n\n"
-                        )
-                        yield (
-                            "event: status_update\n"
-                            f"data: {json.dumps({'status': 'function_call_completed', 'message': f'{func_call_name} completed.'})}\n\n"
-                        )
-                except Exception as e:
-                    logger.error(f"Error executing tool {func_call_name}: {e}")
-                    yield (
-                        "event: tool_error\n"
-                        f"data: {json.dumps({'tool': func_call_name, 'error': str(e)})}\n\n"
-                    )
-
-                # Reset buffers for potential subsequent calls
-                func_call_name = None
-                func_call_args_buffer = ""
-                continue
-
-            # Legacy/old-style function-call event handlers:
-            elif evt_type == "response.function_call":
-                # Handle function calls to PyBaseball service
-                if hasattr(event, 'function_call'):
-                    func_call = event.function_call
-                    func_name = func_call.name if hasattr(func_call, 'name') else ''
-                    logger.info(f"Legacy function call: {func_name}")
-                    
-                    yield f"event: status_update\ndata: {json.dumps({'status': 'function_call_started', 'message': f'Calling {func_name}...'})}\n\n"
-            elif evt_type == "response.function_call.done":
-                # Handle completed function calls to PyBaseball service
-                if hasattr(event, 'function_call'):
-                    func_call = event.function_call
-                    func_name = func_call.name if hasattr(func_call, 'name') else ''
-                    args = json.loads(func_call.arguments) if hasattr(func_call, 'arguments') else {}
-                    logger.info(f"Legacy function call completed: {func_name} with args: {args}")
-                    
+        state = _StreamState(model, cache_key, cache_ttl, coalesce_ms, partial_advice)
+        # Frames of the terminal event, held back until running tool calls have reported
+        final_frames: Sequence[bytes] = _NO_FRAMES
+        try:
+            # Leaving this block closes the stream, on every path, so its HTTP connection returns
+            # to the pool right away rather than whenever the stream is garbage-collected
+            # Held deltas are sent once their coalesce window closes, even if OpenAI goes quiet
+            flush_deadline = lambda: state.last_flush + state.coalesce_window if state.pending_deltas else None
+            async with response, aclosing(_with_heartbeats(response, STREAM_HEARTBEAT_SECONDS, flush_deadline)) as events:
+                async for event in events:
+                    if event is _FLUSH_DUE:
+                        for frame in _flush_deltas(state):
+                            yield frame
+                        continue
+                    if event is None:
+                        # A quiet spell: send anything still batched rather than holding it
+                        for frame in _flush_deltas(state):
+                            yield frame
+                        yield HEARTBEAT_FRAME
+                        continue
+                    state.event_count += 1
+                    # SDK events always carry a type; plain access is cheaper than getattr with a default
                     try:
-                        result = None
-                        
-                        # Route to appropriate PyBaseball function
-                        if func_name == "get_mlb_player_stats":
-                            result = await pybaseball_service.get_player_stats(
-                                args.get('player_name'),
-                                args.get('year')
-                            )
-                        elif func_name == "get_mlb_standings":
-                            result = await pybaseball_service.get_mlb_standings(
-                                args.get('year')
-                            )
-                        elif func_name == "search_mlb_players":
-                            result = await pybaseball_service.search_players(
-                                args.get('search_term')
-                            )
-                        
-                        if result:
-                            logger.info(f"Legacy tool result for {func_name}: {str(result)[:100]}...")
-                            # Stream the tool result back
-                            yield f"event: tool_result\ndata: {json.dumps({'tool': func_name, 'result': result})}\n\n"
-                            yield f"event: status_update\ndata: {json.dumps({'status': 'function_call_completed', 'message': f'{func_name} completed.'})}\n\n"
-                            
-                    except Exception as e:
-                        logger.error(f"Error executing legacy tool {func_name}: {e}")
-                        yield f"event: tool_error\ndata: {json.dumps({'tool': func_name, 'error': str(e)})}\n\n"
-            elif evt_type == "response.output_item.done":
-                item_type = getattr(getattr(event, 'item', None), 'type', None)
-                logger.info(f"Output item done: {item_type}")
-                if item_type == 'message':
-                     # This event might be too quick before response_complete, but can be used.
-                    yield f"event: status_update\ndata: {json.dumps({'status': 'message_generating_done', 'message': 'Finalizing response...'})}\n\n"
-                else:
-                    logger.debug(f"OpenAI response output item done (type: {item_type}): {event}")
-                continue
-            elif evt_type == "response.content_part.added":
-                logger.info(f"Content part added: {event}")
-                continue
-            elif evt_type == "response.output_text.annotation.added":
-                annotation_title = getattr(getattr(event, 'annotation', None), 'title', 'citation')
-                logger.info(f"Annotation added: {annotation_title}")
-                yield f"event: status_update\ndata: {json.dumps({'status': 'annotation_found', 'message': f'Processing {annotation_title}...'})}\n\n"
-            elif evt_type == "response.content_part.done":
-                logger.info(f"Content part done: {event}")
-                continue
-            elif evt_type == "response.completed":
-                logger.info("Response completed, validating final content")
-                try:
-                    # Step 6: Schema validation before finalizing response
-                    is_valid, error_msg = schema_validator.validate_streaming_chunk(
-                        accumulated_content, is_complete=True
-                    )
+                        evt_type = event.type
+                    except AttributeError:
+                        evt_type = None
+                    # Full per-event logging (with each event's repr) only when STREAM_TRACE=1
+                    if _TRACE_EVENTS:
+                        logger.info("Event #%s type: %s, Event data: %s", state.event_count, evt_type, event)
+                    elif logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Event #%s type: %s", state.event_count, evt_type)
                     
-                    if not is_valid:
-                        logger.warning(f"Schema validation failed: {error_msg}")
-                        # Create fallback response using schema validator
-                        fallback_data = schema_validator.create_fallback_response(
-                            accumulated_content, error_msg
-                        )
-                        final_data = {
-                            'status': 'complete',
-                            'final_json': fallback_data,
-                            'response_id': response_id_captured,
-                            'validation_error': error_msg
-                        }
-                        yield f"event: response_complete\ndata: {json.dumps(final_data)}\n\n"
+                    handler = _STREAM_EVENT_HANDLERS.get(evt_type)
+                    if handler is None:
+                        handler = _on_error if hasattr(event, 'error') else _on_unknown
+                    frames = await handler(event, state)
+                    # Batched text precedes whatever any other event reports
+                    if handler is not _on_text_delta:
+                        for frame in _flush_deltas(state):
+                            yield frame
+                    if state.tool_calls:
+                        for frame in _finished_tool_frames(state):
+                            yield frame
+                    if state.finished:
+                        final_frames = frames
                         break
-                    
-                    # Parse the validated content
-                    if accumulated_content.strip().startswith('{'):
-                        logger.info("Parsing accumulated content as JSON")
-                        try:
-                            # Try to parse the JSON
-                            json_content = json.loads(accumulated_content)
-                            
-                            # Check if we need to transform the JSON structure
-                            if 'message' in json_content and 'main_advice' not in json_content:
-                                logger.info("Transforming response format from 'message' to 'main_advice'")
-                                json_content['main_advice'] = json_content['message']
-                                # Keep the confidence if present
-                                if 'confidence' in json_content and 'confidence_score' not in json_content:
-                                    json_content['confidence_score'] = json_content['confidence']
-                                
-                                # Re-serialize the transformed JSON
-                                accumulated_content = json.dumps(json_content)
-                            
-                            parsed_advice = StructuredAdvice.model_validate_json(accumulated_content)
-                        except Exception as e:
-                            logger.error(f"Failed to parse or transform JSON: {e}")
-                            parsed_advice = StructuredAdvice(
-                                main_advice=accumulated_content.strip(),
-                                model_identifier=model
-                            )
-                    else:
-                        logger.info("Parsing accumulated content as plain text")
-                        parsed_advice = StructuredAdvice(
-                            main_advice=accumulated_content.strip(),
-                            model_identifier=model
-                        )
-                    
-                    # Final schema validation on the parsed object
-                    advice_dict = parsed_advice.model_dump()
-                    is_valid, error_msg = schema_validator.validate_json(advice_dict)
-                    
-                    if not is_valid:
-                        logger.warning(f"Final schema validation failed: {error_msg}")
-                        # Create fallback response
-                        fallback_data = schema_validator.create_fallback_response(
-                            accumulated_content, error_msg
-                        )
-                        final_data = {
-                            'status': 'complete',
-                            'final_json': fallback_data,
-                            'response_id': response_id_captured,
-                            'validation_error': error_msg
-                        }
-                    else:
-                        logger.info("Schema validation passed, sending final response")
-                        # Include response_id in the successful final response
-                        final_data = {
-                            'status': 'complete', 
-                            'final_json': advice_dict,
-                            'response_id': response_id_captured
-                        }
-                    
-                    yield f"event: response_complete\ndata: {json.dumps(final_data)}\n\n"
-                    
-                except Exception as e:
-                    logger.error(f"Failed to parse final response: {e}")
-                    fallback_advice = schema_validator.create_fallback_response(
-                        accumulated_content.strip() or "No response received",
-                        f"Parse error: {e}"
-                    )
-                    final_data = {
-                        'status': 'complete',
-                        'final_json': fallback_advice,
-                        'response_id': response_id_captured,
-                        'parse_error': str(e)
-                    }
-                    yield f"event: response_complete\ndata: {json.dumps(final_data)}\n\n"
-                break
-            # Error or failure events
-            elif evt_type in ("response.error", "response.failed") or hasattr(event, 'error'):
-                err_msg = getattr(event, 'error', None)
-                if err_msg is None and hasattr(event, 'message'): # Check for message attribute if error is not present
-                    err_msg = event.message
-                err_text = str(err_msg) if err_msg else "Unknown error" # Ensure err_text is always a string
-                logger.error(f"OpenAI API error: {err_text}")
-                yield f"event: error\ndata: {json.dumps({'error': 'API_ERROR', 'message': err_text})}\n\n"
-                break
-            else:
-                logger.warning(f"Unhandled event type: {evt_type}, Event: {event}")
-                # Try to handle the unknown event generically
-                yield f"event: status_update\ndata: {json.dumps({'status': 'unknown_event', 'message': f'Received event: {evt_type}'})}\n\n"
+                    for frame in frames:
+                        yield frame
+            
+            for frame in _flush_deltas(state):
+                yield frame
+            async for frame in _wait_for_tools(state):
+                yield frame
+            for frame in final_frames:
+                yield frame
+        finally:
+            # Abandoned streams (errors, client disconnects) don't leave tool calls running
+            for _, task in state.tool_calls:
+                task.cancel()
 
-        logger.info(f"Stream completed with {event_count} total events")
+        logger.info("Stream completed with %s total events", state.event_count)
         # If we exited the loop without any events, that's a problem
-        if event_count == 0:
+        if state.event_count == 0:
             logger.error("No events received from OpenAI API")
-            yield f"event: error\ndata: {json.dumps({'error': 'NO_EVENTS', 'message': 'No events received from the API'})}\n\n"
+            yield error_frame("NO_EVENTS", "No events received from the API")
 
     except APIConnectionError as e:
-        logger.error(f"OpenAI API request failed to connect: {e}")
-        yield f"event: error\ndata: {json.dumps({'error': 'CONNECTION_ERROR', 'message': str(e)})}\n\n"
+        logger.error("OpenAI API request failed to connect: %s", e)
+        yield error_frame("CONNECTION_ERROR", e)
     except RateLimitError as e:
-        logger.error(f"OpenAI API request exceeded rate limit: {e}")
-        yield f"event: error\ndata: {json.dumps({'error': 'RATE_LIMIT_ERROR', 'message': str(e)})}\n\n"
+        logger.error("OpenAI API request exceeded rate limit: %s", e)
+        yield error_frame("RATE_LIMIT_ERROR", e)
     except AuthenticationError as e:
-        logger.error(f"OpenAI API authentication failed: {e}")
-        yield f"event: error\ndata: {json.dumps({'error': 'AUTH_ERROR', 'message': str(e)})}\n\n"
+        logger.error("OpenAI API authentication failed: %s", e)
+        yield error_frame("AUTH_ERROR", e)
     except APIError as e:
-        logger.error(f"OpenAI API returned an API Error: {e}")
-        yield f"event: error\ndata: {json.dumps({'error': 'API_ERROR', 'message': str(e)})}\n\n"
+        logger.error("OpenAI API returned an API Error: %s", e)
+        yield error_frame("API_ERROR", e)
     except BadRequestError as e:
-        logger.error(f"OpenAI API bad request error: {e}")
-        yield f"event: error\ndata: {json.dumps({'error': 'BAD_REQUEST', 'message': str(e)})}\n\n"
+        logger.error("OpenAI API bad request error: %s", e)
+        yield error_frame("BAD_REQUEST", e)
     except NotFoundError as e:
-        logger.error(f"OpenAI API resource not found: {e}")
-        yield f"event: error\ndata: {json.dumps({'error': 'NOT_FOUND', 'message': str(e)})}\n\n"
+        logger.error("OpenAI API resource not found: %s", e)
+        yield error_frame("NOT_FOUND", e)
     except Exception as e:
-        logger.error(f"An unexpected error occurred while streaming: {type(e).__name__}: {e}")
-        yield f"event: error\ndata: {json.dumps({'error': 'UNEXPECTED_ERROR', 'message': f'{type(e).__name__}: {str(e)}'})}\n\n"
+        logger.error("An unexpected error occurred while streaming: %s: %s", type(e).__name__, e)
+        yield error_frame("UNEXPECTED_ERROR", f"{type(e).__name__}: {e}")
+
 
+# Non-streaming responses: request/parse helpers and the get_response entry point
 
-# Existing get_response function (non-streaming, uses synchronous client.responses.create)
-def get_response(
+def _build_response_request(
+    prompt: str,
+    model: str,
+    instructions: Optional[str],
+    max_tokens: int,
+    enable_web_search: bool,
+    prompt_type: str
+) -> Dict[str, Any]:
+    """
+    Builds the keyword arguments for a non-streaming `responses.create` call.
+    """
+    # Get appropriate system instructions
+    if instructions is None:
+        instructions = prompt_loader.get_system_prompt(prompt_type)
+    
+    structured_outputs = check_model_compatibility(model).get("structured_outputs", False)
+    
+    # Build the complete prompt using the new modular system
+    full_prompt = prompt_loader.build_full_prompt(
+        user_prompt=prompt,
+        system_prompt=instructions,
+        schema=None if structured_outputs else _ADVICE_SCHEMA,
+        enable_web_search=enable_web_search
+    )
+    
+    logger.debug("Request to OpenAI Responses API model: %s", model)
+    
+    request = {
+        "model": model,
+        "input": full_prompt,
+        "stream": False,
+        "max_output_tokens": max_tokens,
+        "tools": _TOOLS_WITH_SEARCH if enable_web_search else _PYBASEBALL_TOOLS,
+        "temperature": 0,  # Set temperature to 0 for deterministic responses
+        "extra_body": {"prompt_cache_key": _prompt_cache_key(model, prompt_type, False, enable_web_search)}
+    }
+    if structured_outputs:
+        request["text"] = _ADVICE_TEXT_FORMAT
+    return request
+
+def _extract_text(response) -> str:
+    """Returns the response's output text, or an empty string if there is none."""
+    # The SDK's output_text already joins every output_text part of the message items
+    text = getattr(response, "output_text", None)
+    if text:
+        return text
+    for output_item in response.output or ():
+        for content_item in getattr(output_item, "content", None) or ():
+            text = getattr(content_item, "text", None)
+            if text:
+                return text
+    return ""
+
+def _parse_advice(response, model: str) -> Optional[StructuredAdvice]:
+    """Parses the response's JSON text as StructuredAdvice; None if it can't be parsed."""
+    parsed_advice = _validate_advice_json(_extract_text(response))
+    if parsed_advice is None:
+        logger.warning("Could not parse response as StructuredAdvice")
+        return None
+    if parsed_advice.model_identifier is None:
+        parsed_advice.model_identifier = model
+    return parsed_advice
+
+def _error_advice(e: Exception) -> StructuredAdvice:
+    """Maps a failure in the non-streaming path to an error StructuredAdvice."""
+    if isinstance(e, json.JSONDecodeError):
+        logger.error("Failed to decode JSON from OpenAI response: %s", e)
+        return StructuredAdvice(main_advice=f"Error: Failed to decode JSON response. {e}")
+    if isinstance(e, APIConnectionError):
+        logger.error("OpenAI API request failed to connect: %s", e)
+        return StructuredAdvice(main_advice=f"Error: API Connection Error. {e}")
+    if isinstance(e, RateLimitError):
+        logger.error("OpenAI API request exceeded rate limit: %s", e)
+        return StructuredAdvice(main_advice=f"Error: Rate Limit Exceeded. {e}")
+    if isinstance(e, AuthenticationError):
+        logger.error("OpenAI API authentication failed: %s", e)
+        return StructuredAdvice(main_advice=f"Error: Authentication Failed. {e}")
+    if isinstance(e, APIError):
+        logger.error("OpenAI API returned an API Error: %s", e)
+        return StructuredAdvice(main_advice=f"Error: OpenAI API Error. {e}")
+    logger.error("An unexpected error occurred: %s", e)
+    return StructuredAdvice(main_advice=f"Error: An unexpected error occurred. {e}")
+
+async def get_response(
     prompt: str,
     model: str = OPENAI_DEFAULT_MODEL_INTERNAL,
     instructions: str = None, 
     max_tokens: int = 2000,
     enable_web_search: bool = True,
-    prompt_type: str = "default"
+    prompt_type: str = "default",
+    cache_ttl: int = RESPONSE_CACHE_TTL_SECONDS
 ) -> StructuredAdvice:
     """
     Gets a non-streaming response from OpenAI's Responses API.
+    Awaits the round-trip on AsyncOpenAI, so no worker thread is held while waiting.
     
     Args:
         prompt_type: Type of prompt to use from config ("default", "detailed", "baseball", "football", "basketball")
+        cache_ttl: Seconds to reuse this advice for identical requests; 0 disables the cache
     """
     try:
-        # Get appropriate system instructions
-        if instructions is None:
-            instructions = prompt_loader.get_system_prompt(prompt_type)
+        request = _build_response_request(prompt, model, instructions, max_tokens, enable_web_search, prompt_type)
+        cache_key = response_cache.make_key(request) if cache_ttl > 0 else None
+        if cache_key:
+            cached_advice = await response_cache.get(cache_key)
+            if cached_advice is not None:
+                return cached_advice
         
-        # Build the complete prompt using the new modular system
-        full_prompt = prompt_loader.build_full_prompt(
-            user_prompt=prompt,
-            system_prompt=instructions,
-            schema=StructuredAdvice.model_json_schema(),
-            enable_web_search=enable_web_search
-        )
-        
-        logger.info(f"Request to OpenAI Responses API model: {model}")
-        
-        # Prepare tools including PyBaseball integration
-        tools = []
-
-        # Add web search if enabled
-        if enable_web_search:
-            tools.append({
-                "type": "web_search"
-            })
-
-        # Add PyBaseball tools
-        tools.extend([
-            {
-                "type": "function",
-                "name": "get_mlb_player_stats",
-                "description": "Get season statistics for a specific MLB player",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "player_name": {
-                            "type": "string",
-                            "description": "Full name of the player (e.g., 'Shohei Ohtani')"
-                        },
-                        "year": {
-                            "type": "integer",
-                            "description": "Season year (optional, defaults to current year)"
-                        }
-                    },
-                    "required": ["player_name"]
-                }
-            },
-            {
-                "type": "function",
-                "name": "get_mlb_standings",
-                "description": "Get current MLB standings by division",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "year": {
-                            "type": "integer",
-                            "description": "Season year (optional)"
-                        }
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "name": "search_mlb_players",
-                "description": "Search for MLB players by partial name",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "search_term": {
-                            "type": "string",
-                            "description": "Partial name to search for"
-                        }
-                    },
-                    "required": ["search_term"]
-                }
-            }
-        ])
-        
-        response = client.responses.create(
-            model=model,
-            input=full_prompt,
-            stream=False,
-            max_output_tokens=max_tokens,
-            tools=tools if tools else None,
-            temperature=0  # Set temperature to 0 for deterministic responses
-        )
-        
-        # Extract content from response
-        if response.output and len(response.output) > 0:
-            for output_item in response.output:
-                if hasattr(output_item, 'content') and output_item.content:
-                    for content_item in output_item.content:
-                        if hasattr(content_item, 'text'):
-                            response_text = content_item.text
-                            
-                            # Try to parse as JSON first
-                            try:
-                                if response_text.strip().startswith('{'):
-                                    # Transform JSON if needed
-                                    json_content = json.loads(response_text)
-                                    
-                                    # Map "message" to "main_advice" if needed
-                                    if 'message' in json_content and 'main_advice' not in json_content:
-                                        json_content['main_advice'] = json_content['message']
-                                        # Keep the confidence if present
-                                        if 'confidence' in json_content and 'confidence_score' not in json_content:
-                                            json_content['confidence_score'] = json_content['confidence']
-                                        
-                                        # Re-serialize the transformed JSON
-                                        response_text = json.dumps(json_content)
-                                    
-                                    parsed_advice = StructuredAdvice.model_validate_json(response_text)
-                                    if parsed_advice.model_identifier is None:
-                                        parsed_advice.model_identifier = model
-                                    return parsed_advice
-                            except:
-                                pass
-        
-        # Fallback error case
-        return StructuredAdvice(
-            main_advice="Error: No valid response received from OpenAI",
-            reasoning="The API response was empty or malformed"
-        )
-
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to decode JSON from OpenAI response: {e}")
-        return StructuredAdvice(main_advice=f"Error: Failed to decode JSON response. {e}")
-    except APIConnectionError as e:
-        logger.error(f"OpenAI API request failed to connect: {e}")
-        return StructuredAdvice(main_advice=f"Error: API Connection Error. {e}")
-    except RateLimitError as e:
-        logger.error(f"OpenAI API request exceeded rate limit: {e}")
-        return StructuredAdvice(main_advice=f"Error: Rate Limit Exceeded. {e}")
-    except AuthenticationError as e:
-        logger.error(f"OpenAI API authentication failed: {e}")
-        return StructuredAdvice(main_advice=f"Error: Authentication Failed. {e}")
-    except APIError as e:
-        logger.error(f"OpenAI API returned an API Error: {e}")
-        return StructuredAdvice(main_advice=f"Error: OpenAI API Error. {e}")
+        await rate_limiter.acquire(estimate_tokens(request))
+        response = await get_async_client().responses.create(**request)
+        parsed_advice = _parse_advice(response, model)
+        if parsed_advice is None:
+            # Fallback error case
+            return StructuredAdvice(
+                main_advice="Error: No valid response received from OpenAI",
+                reasoning="The API response was empty or malformed"
+            )
+        if cache_key:
+            await response_cache.set(cache_key, parsed_advice, cache_ttl)
+        return parsed_advice
     except Exception as e:
-        logger.error(f"An unexpected error occurred: {e}")
-        return StructuredAdvice(main_advice=f"Error: An unexpected error occurred. {e}")
+        return _error_advice(e)
 
 
 # Add a test function at the end of the file
@@ -796,8 +1191,8 @@ async def test_openai_connectivity(model: str = OPENAI_DEFAULT_MODEL_INTERNAL) -
         dict: Response information including success status and any error details
     """
     try:
-        logger.info(f"Testing OpenAI connectivity with model: {model}")
-        response = await async_client.responses.create(
+        logger.info("Testing OpenAI connectivity with model: %s", model)
+        response = await get_async_client().responses.create(
             model=model,
             input="Hello, this is a test message. Please respond with 'API connection successful'.",
             stream=False,
@@ -805,31 +1200,22 @@ async def test_openai_connectivity(model: str = OPENAI_DEFAULT_MODEL_INTERNAL) -
             temperature=0
         )
         
-        # Extract basic response info
-        response_text = None
-        if response.output and len(response.output) > 0:
-            for output_item in response.output:
-                if hasattr(output_item, 'content') and output_item.content:
-                    for content_item in output_item.content:
-                        if hasattr(content_item, 'text'):
-                            response_text = content_item.text
-                            break
-                    if response_text:
-                        break
+        # Extract basic response info; usage may be missing or None
+        response_text = _extract_text(response) or None
+        usage = getattr(response, "usage", None)
         
         # Compile results
         result = {
             "success": True,
             "model": model,
-            "response_id": response.id if hasattr(response, 'id') else None,
+            "response_id": getattr(response, "id", None),
             "response_text": response_text,
             "usage": {
-                "input_tokens": response.usage.input_tokens if hasattr(response, 'usage') else None,
-                "output_tokens": response.usage.output_tokens if hasattr(response, 'usage') else None,
-                "total_tokens": response.usage.total_tokens if hasattr(response, 'usage') else None
+                key: getattr(usage, key, None)
+                for key in ("input_tokens", "output_tokens", "total_tokens")
             }
         }
-        logger.info(f"OpenAI connectivity test successful: {result}")
+        logger.info("OpenAI connectivity test successful: %s", result)
         return result
         
     except Exception as e:
@@ -839,6 +1225,6 @@ async def test_openai_connectivity(model: str = OPENAI_DEFAULT_MODEL_INTERNAL) -
             "error_type": type(e).__name__,
             "error_message": str(e)
         }
-        logger.error(f"OpenAI connectivity test failed: {error_result}")
+        logger.error("OpenAI connectivity test failed: %s", error_result)
         return error_result
 
@@ -0,0 +1,123 @@
+"""
+Incremental extraction of one string field from a JSON object that is still streaming.
+Lets the advice stream show the main_advice text as it is generated, before the
+complete JSON can be parsed.
+"""
+
+from typing import List, Optional
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+class JsonFieldStream:
+    """
+    Fed a JSON object in arbitrary chunks, returns the decoded text of one top-level
+    string field as it arrives. Stops scanning once that field is complete, or as soon
+    as the text turns out not to be a JSON object.
+    """
+    __slots__ = (
+        "field", "done", "_started", "_depth", "_in_string", "_escape", "_unicode",
+        "_high_surrogate", "_after_colon", "_reading_key", "_key_parts", "_last_key", "_capturing"
+    )
+
+    def __init__(self, field: str):
+        self.field = field
+        self.done = False
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # Hex digits of a \uXXXX escape read so far, or None outside one
+        self._unicode: Optional[str] = None
+        self._high_surrogate: Optional[int] = None
+        # Whether the current top-level member has reached its value
+        self._after_colon = False
+        self._reading_key = False
+        self._key_parts: List[str] = []
+        self._last_key: Optional[str] = None
+        self._capturing = False
+
+    def feed(self, chunk: str) -> str:
+        """Consumes the next chunk of JSON and returns any new text of the field."""
+        if self.done:
+            return ""
+        out: List[str] = []
+        for ch in chunk:
+            if self._in_string:
+                if self._unicode is not None:
+                    self._unicode += ch
+                    if len(self._unicode) == 4:
+                        self._emit(self._decode_unicode(), out)
+                    continue
+                if self._escape:
+                    self._escape = False
+                    if ch == 'u':
+                        self._unicode = ""
+                    else:
+                        self._emit(_ESCAPES.get(ch, ch), out)
+                    continue
+                if ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._capturing:
+                        self.done = True
+                        break
+                    if self._reading_key:
+                        self._reading_key = False
+                        self._last_key = "".join(self._key_parts)
+                else:
+                    self._emit(ch, out)
+                continue
+            if not self._started:
+                if ch.isspace():
+                    continue
+                if ch != '{':
+                    # Plain text, not advice JSON
+                    self.done = True
+                    break
+                self._started = True
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    if self._after_colon:
+                        self._capturing = self._last_key == self.field
+                    else:
+                        self._reading_key = True
+                        self._key_parts = []
+            elif ch in '{[':
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self.done = True
+                    break
+            elif self._depth == 1:
+                if ch == ':':
+                    self._after_colon = True
+                elif ch == ',':
+                    self._after_colon = False
+                    self._last_key = None
+        return "".join(out)
+
+    def _emit(self, text: str, out: List[str]) -> None:
+        if self._capturing:
+            out.append(text)
+        elif self._reading_key:
+            self._key_parts.append(text)
+
+    def _decode_unicode(self) -> str:
+        hex_digits, self._unicode = self._unicode, None
+        try:
+            code = int(hex_digits, 16)
+        except ValueError:
+            return ""
+        if 0xD800 <= code < 0xDC00:
+            # First half of a surrogate pair; wait for the second
+            self._high_surrogate = code
+            return ""
+        high, self._high_surrogate = self._high_surrogate, None
+        if high is not None and 0xDC00 <= code < 0xE000:
+            return chr(0x10000 + ((high - 0xD800) << 10) + (code - 0xDC00))
+        if 0xDC00 <= code < 0xE000:
+            return ""
+        return chr(code)
@@ -6,7 +6,7 @@ Combines universal base prompts with sport-specific prompts for systematic promp
 import os
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -56,6 +56,12 @@ class PromptLoader:
         
         # Cache for loaded prompts to avoid repeated file I/O
         self._prompt_cache: Dict[str, str] = {}
+        # Assembled prompts, built once per combination of options instead of per request
+        self._universal_cache: Optional[Dict[str, str]] = None
+        self._system_prompt_cache: Dict[Tuple[str, bool], str] = {}
+        # Formatted schema instructions, keyed by id() of the schema; the schema object is
+        # kept alongside so its id can't be reused while the entry exists
+        self._schema_instruction_cache: Dict[int, Tuple[dict, str]] = {}
     
     def _load_file_content(self, file_path: Path) -> str:
         """Load content from a markdown file with caching"""
@@ -71,6 +77,8 @@ class PromptLoader:
                 return content
         except FileNotFoundError:
             logger.warning(f"Prompt file not found: {file_path}")
+            # Remember the miss too, so a missing optional file isn't retried on every request
+            self._prompt_cache[cache_key] = ""
             return ""
         except Exception as e:
             logger.error(f"Error loading prompt file {file_path}: {e}")
@@ -78,6 +86,9 @@ class PromptLoader:
     
     def _load_universal_prompts(self) -> Dict[str, str]:
         """Load all universal prompt components"""
+        if self._universal_cache is not None:
+            return self._universal_cache
+        
         universal_files = {
             'base_instructions': 'base-instructions@1.2.0.md',
             'legacy_base_instructions': 'base-instructions@1.1.0.md',  # Fallback for non-Step 2
@@ -93,6 +104,7 @@ class PromptLoader:
             file_path = self.universal_path / filename
             universal_prompts[key] = self._load_file_content(file_path)
         
+        self._universal_cache = universal_prompts
         return universal_prompts
     
     def _load_sport_specific_prompt(self, sport: str) -> str:
@@ -117,6 +129,11 @@ class PromptLoader:
             logger.info("Using system prompt from environment variable")
             return env_prompt
         
+        cache_key = (prompt_type, use_slim_prompt)
+        cached = self._system_prompt_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         # Load universal components
         universal = self._load_universal_prompts()
         
@@ -141,10 +158,20 @@ class PromptLoader:
         # Fallback if no content was loaded
         if not combined_prompt.strip():
             logger.warning("No prompt content loaded, using hardcoded fallback")
-            return "You are a helpful fantasy sports assistant with deep knowledge of player performance, matchups, and strategy."
+            combined_prompt = "You are a helpful fantasy sports assistant with deep knowledge of player performance, matchups, and strategy."
         
+        self._system_prompt_cache[cache_key] = combined_prompt
         return combined_prompt
     
+    def _schema_instruction(self, schema: dict) -> str:
+        """Instruction asking for JSON matching `schema`; formatting a large schema is slow, so it's cached"""
+        cached = self._schema_instruction_cache.get(id(schema))
+        if cached is not None and cached[0] is schema:
+            return cached[1]
+        instruction = f"IMPORTANT: Please respond with structured JSON that matches this exact schema: {schema}\nThe 'main_advice' field is STRICTLY REQUIRED - all responses MUST include this field or they will fail validation. Always ensure your response includes the 'main_advice' field with a clear, actionable recommendation."
+        self._schema_instruction_cache[id(schema)] = (schema, instruction)
+        return instruction
+    
     def get_assistant_workflow_template(self, current_date: str = None) -> str:
         """
         Get the assistant workflow template for injection into conversation
@@ -164,7 +191,7 @@ class PromptLoader:
         # Replace placeholder with actual date
         return runtime_workflow.replace("{current_date}", current_date)
     
-    def build_conversation_messages(self, user_prompt: str, system_prompt: str, schema: dict, 
+    def build_conversation_messages(self, user_prompt: str, system_prompt: str, schema: Optional[dict] = None,
                                   enable_web_search: bool = False, use_slim_prompt: bool = True) -> List[Dict[str, str]]:
         """
         Build conversation messages for Responses API with Step 2 implementation
@@ -172,7 +199,7 @@ class PromptLoader:
         Args:
             user_prompt: The user's question/request
             system_prompt: Base system prompt for the AI
-            schema: JSON schema for structured responses
+            schema: JSON schema for structured responses; omit when the API enforces it
             enable_web_search: Whether web search is enabled
             use_slim_prompt: Whether to use Step 2 slim prompt architecture
             
@@ -197,8 +224,8 @@ class PromptLoader:
                 system_content += f"\n\n{universal['confidence_guidelines']}"
             
             # Add schema requirement to system prompt with emphasis on required fields
-            schema_instruction = f"\n\nIMPORTANT: Please respond with structured JSON that matches this exact schema: {schema}\nThe 'main_advice' field is STRICTLY REQUIRED - all responses MUST include this field or they will fail validation. Always ensure your response includes the 'main_advice' field with a clear, actionable recommendation."
-            system_content += schema_instruction
+            if schema is not None:
+                system_content += f"\n\n{self._schema_instruction(schema)}"
             
             messages.append({"role": "system", "content": system_content})
             
@@ -222,7 +249,7 @@ class PromptLoader:
         
         return messages
 
-    def build_full_prompt(self, user_prompt: str, system_prompt: str, schema: dict, enable_web_search: bool = False) -> str:
+    def build_full_prompt(self, user_prompt: str, system_prompt: str, schema: Optional[dict] = None, enable_web_search: bool = False) -> str:
         """
         Build the complete prompt with system instructions, universal guidelines, and user input
         Legacy method for backward compatibility
@@ -230,7 +257,7 @@ class PromptLoader:
         Args:
             user_prompt: The user's question/request
             system_prompt: Base system prompt for the AI
-            schema: JSON schema for structured responses
+            schema: JSON schema for structured responses; omit when the API enforces it
             enable_web_search: Whether web search is enabled
         
         Returns:
@@ -254,8 +281,8 @@ class PromptLoader:
             components.append(universal['web_search_guidelines'])
         
         # Add schema requirement with emphasis on required fields
-        schema_instruction = f"IMPORTANT: Please respond with structured JSON that matches this exact schema: {schema}\nThe 'main_advice' field is STRICTLY REQUIRED - all responses MUST include this field or they will fail validation. Always ensure your response includes the 'main_advice' field with a clear, actionable recommendation."
-        components.append(schema_instruction)
+        if schema is not None:
+            components.append(self._schema_instruction(schema))
         
         # Combine all components
         full_instructions = "\n\n".join(components)
@@ -266,6 +293,9 @@ class PromptLoader:
     def clear_cache(self):
         """Clear the prompt cache (useful for development/testing)"""
         self._prompt_cache.clear()
+        self._universal_cache = None
+        self._system_prompt_cache.clear()
+        self._schema_instruction_cache.clear()
         logger.info("Prompt cache cleared")
     
     def get_available_prompt_types(self) -> List[str]:
@@ -1,4 +1,5 @@
 import os
+import asyncio
 import logging
 import httpx
 import json
@@ -6,29 +7,50 @@ from typing import Any, Dict, Optional, List
 
 logger = logging.getLogger(__name__)
 
+class PyBaseballError(str):
+    """
+    Error text returned by a tool call in place of its result. It is still a str, so
+    callers that pass results through (e.g. to the model) are unaffected; callers that
+    must tell failure from success check isinstance(result, PyBaseballError).
+    """
+
 class PyBaseballService:
     """Service for integrating with the PyBaseball API."""
     
-    def __init__(self):
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        """
+        Args:
+            http_client: Shared, pooled client to reuse across calls. When omitted,
+                a short-lived client is opened for each tool call.
+        """
         self.base_url = os.getenv("PYBASEBALL_SERVICE_URL", "https://genius-pybaseball.onrender.com")
         self.timeout = 30  # seconds
+        self.http_client = http_client
+        # Tool calls from concurrent streams run in parallel; cap how many hit the service at once
+        self._concurrency = asyncio.Semaphore(int(os.getenv("PYBASEBALL_MAX_CONCURRENCY", "8")))
         logger.info(f"PyBaseball service initialized with URL: {self.base_url}")
     
+    async def _post(self, client: httpx.AsyncClient, tool_name: str, params: Dict[str, Any]) -> str:
+        response = await client.post(
+            f"{self.base_url}/tools/{tool_name}",
+            json=params,
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        result = response.json()
+        return result.get("result", "No data available")
+
     async def _call_tool(self, tool_name: str, params: Dict[str, Any]) -> str:
         """Call a PyBaseball tool and return the result."""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/tools/{tool_name}",
-                    json=params,
-                    timeout=self.timeout
-                )
-                response.raise_for_status()
-                result = response.json()
-                return result.get("result", "No data available")
+            async with self._concurrency:
+                if self.http_client is not None:
+                    return await self._post(self.http_client, tool_name, params)
+                async with httpx.AsyncClient() as client:
+                    return await self._post(client, tool_name, params)
         except Exception as e:
             logger.error(f"Error calling PyBaseball tool {tool_name}: {e}")
-            return f"Error retrieving data: {str(e)}"
+            return PyBaseballError(f"Error retrieving data: {str(e)}")
     
     # Tool wrapper functions
     async def get_player_stats(self, player_name: str, year: Optional[int] = None) -> Dict[str, Any]:
@@ -0,0 +1,91 @@
+"""
+Client-side rate limiting for OpenAI requests.
+Requests wait for capacity under the account's requests-per-minute and
+tokens-per-minute limits instead of being sent, rejected with a 429 and retried.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# The account's OpenAI limits; 0 leaves that dimension unlimited
+OPENAI_RPM_LIMIT = int(os.getenv("OPENAI_RPM_LIMIT", "0"))
+OPENAI_TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", "0"))
+
+# Rough characters per token for English text, used to estimate request size
+_CHARS_PER_TOKEN = 4
+
+def estimate_tokens(request: Dict[str, Any]) -> int:
+    """
+    Estimates the tokens a `responses.create` call counts against the TPM limit:
+    its input plus the output it may generate, as OpenAI reserves max_output_tokens.
+    """
+    request_input = request.get("input") or ""
+    if not isinstance(request_input, str):
+        request_input = orjson.dumps(request_input)
+    return len(request_input) // _CHARS_PER_TOKEN + request.get("max_output_tokens", 0)
+
+class RateLimiter:
+    """
+    Token buckets for requests and tokens per minute, refilled continuously.
+    Callers are served in arrival order, so a large request isn't starved by small ones.
+    """
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self._request_limit = requests_per_minute
+        self._token_limit = tokens_per_minute
+        # Both buckets start full, so a burst up to the limit goes out right away
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._request_limit > 0 or self._token_limit > 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        if self._request_limit:
+            self._requests = min(self._request_limit, self._requests + elapsed * self._request_limit / 60)
+        if self._token_limit:
+            self._tokens = min(self._token_limit, self._tokens + elapsed * self._token_limit / 60)
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """
+        Waits until one request costing `tokens` fits under both limits, then takes it.
+
+        Args:
+            tokens: Estimated tokens for the request (see estimate_tokens)
+        """
+        if not self.enabled:
+            return
+        async with self._lock:
+            # A request bigger than the whole bucket waits for a full bucket rather than forever
+            tokens = min(tokens, self._token_limit)
+            while True:
+                self._refill()
+                wait = 0.0
+                if self._request_limit and self._requests < 1:
+                    wait = (1 - self._requests) * 60 / self._request_limit
+                if self._token_limit and self._tokens < tokens:
+                    wait = max(wait, (tokens - self._tokens) * 60 / self._token_limit)
+                if wait <= 0:
+                    break
+                logger.debug("Rate limit reached, waiting %.2fs", wait)
+                await asyncio.sleep(wait)
+            if self._request_limit:
+                self._requests -= 1
+            if self._token_limit:
+                self._tokens -= tokens
+
+# Global rate limiter shared by every OpenAI call in this process
+rate_limiter = RateLimiter(OPENAI_RPM_LIMIT, OPENAI_TPM_LIMIT)
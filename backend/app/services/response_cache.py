@@ -0,0 +1,121 @@
+"""
+Content-addressed cache for OpenAI advice responses.
+Identical requests (same model, prompt, instructions, schema and tools) reuse the
+StructuredAdvice from an earlier call instead of another OpenAI round-trip, and
+identical /advice requests can replay the SSE bytes of an earlier stream.
+"""
+
+import hashlib
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+import orjson
+from cachetools import TLRUCache
+
+from app.models import StructuredAdvice
+
+logger = logging.getLogger(__name__)
+
+# How long cached advice is reused; 0 disables caching
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+# How long complete /advice streams are replayed; 0 disables it
+STREAM_CACHE_TTL_SECONDS = int(os.getenv("STREAM_CACHE_TTL_SECONDS", "900"))
+# Entries kept by the in-process cache when Redis isn't configured
+RESPONSE_CACHE_MAX_ENTRIES = 1024
+# Part of every key, so entries written for an older StructuredAdvice shape
+# (e.g. still in Redis across a deploy) are never read back
+_ADVICE_SCHEMA_VERSION = hashlib.sha256(
+    orjson.dumps(StructuredAdvice.model_json_schema(), option=orjson.OPT_SORT_KEYS)
+).hexdigest()[:12]
+
+class ResponseCache:
+    """
+    Caches StructuredAdvice JSON by a SHA-256 hash of the request parameters,
+    versioned by the StructuredAdvice schema.
+    Uses Redis when a URL is given (shared across workers), otherwise an in-process cache.
+    Cache failures are logged and treated as misses so they never fail a request.
+    """
+    
+    def __init__(self, redis_url: Optional[str] = None):
+        self._redis = None
+        if redis_url:
+            # Only needed when Redis is configured
+            import redis.asyncio as redis
+            self._redis = redis.from_url(redis_url)
+        # Values are (payload, ttl_seconds); each entry expires after its own TTL
+        self._local = TLRUCache(
+            maxsize=RESPONSE_CACHE_MAX_ENTRIES,
+            ttu=lambda key, value, now: now + value[1],
+            timer=time.monotonic
+        )
+    
+    @staticmethod
+    def make_key(request: Dict[str, Any], prefix: str = "advice") -> str:
+        """
+        Args:
+            request: The keyword arguments for `responses.create`, or any other
+                JSON-serializable description of the request
+            prefix: Namespace for the key ("advice" or "advice-stream")
+            
+        Returns:
+            Cache key for the request
+        """
+        payload = orjson.dumps(request, option=orjson.OPT_SORT_KEYS)
+        return f"{prefix}:{_ADVICE_SCHEMA_VERSION}:" + hashlib.sha256(payload).hexdigest()
+    
+    async def _get_raw(self, key: str) -> Optional[bytes]:
+        try:
+            if self._redis is not None:
+                return await self._redis.get(key)
+            entry = self._local.get(key)
+            return entry[0] if entry else None
+        except Exception as e:
+            logger.warning("Response cache read failed: %s", e)
+            return None
+    
+    async def _set_raw(self, key: str, value: bytes, ttl: int) -> None:
+        if ttl <= 0:
+            return
+        try:
+            if self._redis is not None:
+                await self._redis.set(key, value, ex=ttl)
+            else:
+                self._local[key] = (value, ttl)
+        except Exception as e:
+            logger.warning("Response cache write failed: %s", e)
+    
+    async def get(self, key: str) -> Optional[StructuredAdvice]:
+        """Returns the cached advice for key, or None on a miss."""
+        cached = await self._get_raw(key)
+        if cached is None:
+            return None
+        try:
+            return StructuredAdvice.model_validate_json(cached)
+        except ValueError as e:
+            logger.warning("Discarding unreadable cached advice: %s", e)
+            return None
+    
+    async def set(self, key: str, advice: StructuredAdvice, ttl: int = RESPONSE_CACHE_TTL_SECONDS) -> None:
+        """Stores advice under key for ttl seconds."""
+        await self._set_raw(key, advice.model_dump_json().encode(), ttl)
+    
+    async def get_stream(self, key: str) -> Optional[bytes]:
+        """Returns the cached SSE bytes of a complete stream, or None on a miss."""
+        return await self._get_raw(key)
+    
+    async def set_stream(self, key: str, frames: bytes, ttl: int = STREAM_CACHE_TTL_SECONDS) -> None:
+        """Stores the SSE bytes of a complete stream under key for ttl seconds."""
+        await self._set_raw(key, frames, ttl)
+    
+    async def clear(self) -> None:
+        """Drops every cached response and stream."""
+        if self._redis is not None:
+            keys = [key async for key in self._redis.scan_iter(match="advice*:*")]
+            if keys:
+                await self._redis.delete(*keys)
+        self._local.clear()
+
+# Global response cache instance
+response_cache = ResponseCache(os.getenv("REDIS_URL"))
@@ -5,6 +5,9 @@ Integrates confidence scoring logging into the response flow.
 
 import json
 import logging
+import queue
+import threading
+import time
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 
@@ -13,6 +16,12 @@ from app.services.confidence_scoring import confidence_scoring_service
 
 logger = logging.getLogger(__name__)
 
+# Queued log entries are written once this many are pending, or after this long
+LOG_BATCH_SIZE = 50
+LOG_FLUSH_INTERVAL_SECONDS = 0.25
+# Longest flush() waits for queued entries before reading without them
+LOG_FLUSH_TIMEOUT_SECONDS = 2.0
+
 class ResponseLogger:
     """
     Service for logging responses with confidence scoring.
@@ -22,8 +31,40 @@ class ResponseLogger:
     def __init__(self):
         """Initialize the response logger."""
         self.confidence_service = confidence_scoring_service
+        self._queue: "queue.Queue[Dict]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        # Entries queued but not yet written (or given up on); flush() waits for zero
+        self._pending = 0
+        self._pending_changed = threading.Condition()
         logger.info("Response logger initialized with confidence scoring")
     
+    def _build_entry(
+        self,
+        advice: StructuredAdvice,
+        user_query: str,
+        conversation_context: Optional[List[Dict]],
+        model_used: str,
+        web_search_used: bool,
+        response_id: Optional[str]
+    ) -> Dict:
+        """Turn a response into the keyword arguments for a confidence log entry."""
+        # Extract confidence score
+        confidence_score = advice.confidence_score
+        if confidence_score is None:
+            logger.warning("Response has no confidence score, using default 0.5")
+            confidence_score = 0.5
+        
+        return {
+            "response_text": self._format_response_text(advice),
+            "confidence_score": confidence_score,
+            "user_query": user_query,
+            "model_used": model_used,
+            "web_search_used": web_search_used,
+            "conversation_context": self._serialize_conversation_context(conversation_context),
+            "response_id": response_id
+        }
+    
     def log_response(
         self,
         advice: StructuredAdvice,
@@ -38,33 +79,115 @@ class ResponseLogger:
         Returns the log entry ID if successful, None if failed.
         """
         try:
-            # Extract confidence score
-            confidence_score = advice.confidence_score
-            if confidence_score is None:
-                logger.warning("Response has no confidence score, using default 0.5")
-                confidence_score = 0.5
-            
-            # Prepare response text
-            response_text = self._format_response_text(advice)
-            
-            # Log the entry
-            entry_id = self.confidence_service.log_confidence_entry(
-                response_text=response_text,
-                confidence_score=confidence_score,
-                user_query=user_query,
-                model_used=model_used,
-                web_search_used=web_search_used,
-                conversation_context=self._serialize_conversation_context(conversation_context),
-                response_id=response_id
+            entry = self._build_entry(
+                advice, user_query, conversation_context, model_used, web_search_used, response_id
             )
+            entry_id = self.confidence_service.log_confidence_entry(**entry)
             
-            logger.info(f"Logged response {entry_id} with confidence {confidence_score}")
+            logger.info(f"Logged response {entry_id} with confidence {entry['confidence_score']}")
             return entry_id
             
         except Exception as e:
             logger.error(f"Failed to log response: {e}")
             return None
     
+    def enqueue_response(
+        self,
+        advice: StructuredAdvice,
+        user_query: str,
+        conversation_context: Optional[List[Dict]] = None,
+        model_used: str = "unknown",
+        web_search_used: bool = False,
+        response_id: Optional[str] = None
+    ) -> bool:
+        """
+        Queue a response for batched logging instead of writing it inline.
+        A background thread writes queued entries with one INSERT per batch.
+        Returns True if the entry was queued.
+        """
+        try:
+            entry = self._build_entry(
+                advice, user_query, conversation_context, model_used, web_search_used, response_id
+            )
+            entry["timestamp"] = datetime.utcnow()
+            self._ensure_writer()
+            with self._pending_changed:
+                self._pending += 1
+            self._queue.put(entry)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to queue response for logging: {e}")
+            return False
+    
+    def flush(self, timeout: float = LOG_FLUSH_TIMEOUT_SECONDS) -> bool:
+        """
+        Wait up to `timeout` seconds for every queued entry to be written.
+        Blocks the calling thread, so async code should run it in a worker thread.
+        
+        Returns:
+            True if the queue drained, False if the wait timed out
+        """
+        with self._pending_changed:
+            if self._pending:
+                # Restart the writer if it died, rather than waiting on nothing
+                self._ensure_writer()
+            drained = self._pending_changed.wait_for(lambda: self._pending == 0, timeout)
+        if not drained:
+            logger.warning(f"Timed out after {timeout}s waiting for queued confidence entries")
+        return drained
+    
+    def _ensure_writer(self) -> None:
+        """Start the background writer thread on first use."""
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(
+                    target=self._run_writer, name="confidence-log-writer", daemon=True
+                )
+                self._writer.start()
+    
+    def _run_writer(self) -> None:
+        """Collect queued entries into batches and write each batch in one transaction."""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + LOG_FLUSH_INTERVAL_SECONDS
+            while len(batch) < LOG_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            try:
+                self._write_batch(batch)
+            finally:
+                with self._pending_changed:
+                    self._pending -= len(batch)
+                    self._pending_changed.notify_all()
+    
+    def _write_batch(self, batch: List[Dict]) -> None:
+        """
+        Write a batch in one transaction. If that fails (e.g. one duplicate response_id),
+        write its entries one at a time so only the bad ones are lost.
+        """
+        try:
+            self.confidence_service.log_confidence_entries(batch)
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(f"Failed to write queued confidence entry: {e}")
+                return
+            logger.warning(f"Batch write of {len(batch)} confidence entries failed, retrying one by one: {e}")
+        
+        for entry in batch:
+            try:
+                self.confidence_service.log_confidence_entries([entry])
+            except Exception as e:
+                logger.error(f"Failed to write queued confidence entry {entry.get('response_id')}: {e}")
+    
     def _format_response_text(self, advice: StructuredAdvice) -> str:
         """Format the advice into a text representation for logging."""
         parts = []
@@ -104,6 +227,8 @@ class ResponseLogger:
         This is called when user feedback is received about the advice quality.
         """
         try:
+            # The response may still be waiting in the write queue
+            self.flush()
             success = self.confidence_service.update_outcome(response_id, outcome, feedback_notes)
             if success:
                 logger.info(f"Updated outcome for response {response_id}: {outcome}")
@@ -114,10 +239,11 @@ class ResponseLogger:
             logger.error(f"Error updating response outcome: {e}")
             return False
     
-    def get_recent_logs(self, limit: int = 20) -> List[Dict]:
+    def get_recent_logs(self, limit: int = 20, include_content: bool = True) -> List[Dict]:
         """Get recent confidence logs for monitoring."""
         try:
-            return self.confidence_service.get_recent_entries(limit)
+            self.flush()
+            return self.confidence_service.get_recent_entries(limit, include_content=include_content)
         except Exception as e:
             logger.error(f"Error getting recent logs: {e}")
             return []
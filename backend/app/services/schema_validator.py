@@ -5,10 +5,11 @@ Validates streaming JSON responses against the StructuredAdvice schema.
 
 import json
 import logging
+import orjson
 from typing import Dict, Any, Optional, Union
 from pathlib import Path
-import jsonschema
-from jsonschema import validate, ValidationError
+import fastjsonschema
+from fastjsonschema import JsonSchemaValueException
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +22,9 @@ class SchemaValidator:
     def __init__(self):
         """Initialize the schema validator with the response schema."""
         self.schema = self._load_schema()
+        # Compile the schema to a Python validation function once, instead of
+        # re-checking and interpreting it on every response
+        self._validate = fastjsonschema.compile(self.schema)
         logger.info("Schema validator initialized")
     
     def _load_schema(self) -> Dict[str, Any]:
@@ -160,8 +164,8 @@ class SchemaValidator:
             # Parse JSON string if needed
             if isinstance(json_data, str):
                 try:
-                    data = json.loads(json_data)
-                except json.JSONDecodeError as e:
+                    data = orjson.loads(json_data)
+                except orjson.JSONDecodeError as e:
                     return False, f"Invalid JSON format: {e}"
             else:
                 data = json_data
@@ -170,10 +174,10 @@ class SchemaValidator:
             transformed_data = self._transform_json_format(data)
             
             # Validate against schema
-            validate(instance=transformed_data, schema=self.schema)
+            self._validate(transformed_data)
             return True, None
             
-        except ValidationError as e:
+        except JsonSchemaValueException as e:
             error_msg = f"Schema validation failed: {e.message}"
             logger.warning(error_msg)
             return False, error_msg
@@ -203,18 +207,18 @@ class SchemaValidator:
         # For partial responses, check if it's potentially valid JSON
         try:
             # Try to parse as JSON - if it fails, it might be incomplete
-            data = json.loads(accumulated_json)
+            data = orjson.loads(accumulated_json)
             
             # Apply transformations for better schema compatibility
             transformed_data = self._transform_json_format(data)
             
             # If it parses, validate against schema
-            validate(instance=transformed_data, schema=self.schema)
+            self._validate(transformed_data)
             return True, None
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             # Incomplete JSON is expected during streaming
             return True, None
-        except ValidationError as e:
+        except JsonSchemaValueException as e:
             if is_complete:
                 # Only report validation errors for complete responses
                 error_msg = f"Schema validation failed: {e.message}"
@@ -244,8 +248,8 @@ class SchemaValidator:
         """
         # Try to extract useful content from original_text if it's JSON
         try:
-            if original_text.strip().startswith('{'):
-                data = json.loads(original_text)
+            if original_text.lstrip().startswith('{'):
+                data = orjson.loads(original_text)
                 
                 # Apply our transformations to recover as much as possible
                 transformed_data = self._transform_json_format(data)
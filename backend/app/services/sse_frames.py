@@ -0,0 +1,42 @@
+"""
+Server-Sent Event frame builders for the /advice stream.
+
+Every frame sent while streaming goes through these functions, so they are kept
+small and fully typed: the module compiles unchanged with mypyc
+(`mypyc app/services/sse_frames.py`, done in the Docker build) and falls back to
+plain Python when no compiled extension is present.
+"""
+
+from typing import Any, Dict
+
+import orjson
+
+# Text deltas are the hot path, so their framing is precomposed and only the
+# delta string itself is serialized per event
+TEXT_DELTA_PREFIX: bytes = b'event: text_delta\ndata: {"delta":'
+FRAME_SUFFIX: bytes = b'}\n\n'
+
+# Error frames differ only in their message, so the rest of each frame is prebuilt
+ERROR_FRAME_PREFIXES: Dict[str, bytes] = {
+    code: b'event: error\ndata: {"error":"' + code.encode() + b'","message":'
+    for code in (
+        "API_ERROR", "AUTH_ERROR", "BAD_REQUEST", "CONNECTION_ERROR",
+        "NO_EVENTS", "NOT_FOUND", "RATE_LIMIT_ERROR", "UNEXPECTED_ERROR"
+    )
+}
+
+# SSE comment line sent while OpenAI is silent (e.g. during web search) so proxies
+# don't close the idle connection; EventSource clients ignore it
+HEARTBEAT_FRAME: bytes = b": ping\n\n"
+
+def sse_frame(event: str, data: Dict[str, Any]) -> bytes:
+    """Formats one Server-Sent Event frame with a JSON payload."""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+def text_delta_frame(delta: str) -> bytes:
+    """Formats a `text_delta` frame; same bytes as sse_frame("text_delta", {"delta": delta})."""
+    return TEXT_DELTA_PREFIX + orjson.dumps(delta) + FRAME_SUFFIX
+
+def error_frame(code: str, message: Any) -> bytes:
+    """Formats an `error` frame for one of the codes in ERROR_FRAME_PREFIXES."""
+    return ERROR_FRAME_PREFIXES[code] + orjson.dumps(str(message)) + FRAME_SUFFIX
@@ -14,6 +14,8 @@ import sys
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import numpy as np
+
 # Add the app directory to the Python path
 sys.path.append(str(Path(__file__).parent.parent))
 
@@ -28,23 +30,25 @@ except ImportError:
 from app.services.confidence_scoring import confidence_scoring_service
 from app.models import ConfidenceLog
 
+# Confidence band edges shared by the calibration breakdown
+BAND_EDGES = np.array([0.5, 0.7, 0.9])
+BAND_NAMES = ("low_confidence", "medium_confidence", "high_confidence", "very_high_confidence")
+BAND_RANGES = ((0.0, 0.5), (0.5, 0.7), (0.7, 0.9), (0.9, 1.0))
+
 def calculate_brier_score_manual(confidence_scores, outcomes):
     """
     Manual Brier score calculation when sklearn is not available.
     Brier score = (1/n) * Σ(predicted_probability - actual_outcome)²
     """
-    if len(confidence_scores) != len(outcomes):
+    confidence_scores = np.asarray(confidence_scores, dtype=np.float64)
+    outcomes = np.asarray(outcomes, dtype=np.float64)
+    if confidence_scores.shape != outcomes.shape:
         raise ValueError("Confidence scores and outcomes must have the same length")
     
-    if len(confidence_scores) == 0:
+    if confidence_scores.size == 0:
         return None
     
-    total_score = sum(
-        (conf - outcome) ** 2 
-        for conf, outcome in zip(confidence_scores, outcomes)
-    )
-    
-    return total_score / len(confidence_scores)
+    return float(np.mean((confidence_scores - outcomes) ** 2))
 
 def generate_brier_report(days_back: int = 7) -> dict:
     """Generate comprehensive Brier score report."""
@@ -67,31 +71,39 @@ def generate_brier_report(days_back: int = 7) -> dict:
     db = confidence_scoring_service.get_db_session()
     try:
         cutoff_date = datetime.utcnow() - timedelta(days=days_back)
-        entries = db.query(ConfidenceLog).filter(
+        # Fetch only the columns the analysis needs, as plain tuples
+        rows = db.query(
+            ConfidenceLog.confidence_score,
+            ConfidenceLog.outcome,
+            ConfidenceLog.model_used,
+            ConfidenceLog.web_search_used
+        ).filter(
             ConfidenceLog.outcome.isnot(None),
             ConfidenceLog.timestamp >= cutoff_date
         ).all()
         
-        if entries:
-            confidence_scores = [entry.confidence_score for entry in entries]
-            outcomes = [1.0 if entry.outcome else 0.0 for entry in entries]
+        if rows:
+            confidence_scores = np.fromiter((r[0] for r in rows), dtype=np.float64, count=len(rows))
+            outcomes = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+            models = np.array([r[2] for r in rows])
+            search_used = np.fromiter((bool(r[3]) for r in rows), dtype=bool, count=len(rows))
             
             # Calculate Brier score using sklearn if available
             if SKLEARN_AVAILABLE:
-                sklearn_brier = brier_score_loss(outcomes, confidence_scores)
+                sklearn_brier = float(brier_score_loss(outcomes, confidence_scores))
                 print(f"📊 Sklearn Brier Score: {sklearn_brier:.4f}")
             else:
                 sklearn_brier = calculate_brier_score_manual(confidence_scores, outcomes)
                 print(f"📊 Manual Brier Score: {sklearn_brier:.4f}")
             
             # Calibration analysis
-            calibration_bands = analyze_calibration(entries)
+            calibration_bands = analyze_calibration(confidence_scores, outcomes)
             
             # Model performance breakdown
-            model_performance = analyze_by_model(entries)
+            model_performance = analyze_by_model(confidence_scores, outcomes, models)
             
             # Search vs no-search performance
-            search_performance = analyze_by_search_usage(entries)
+            search_performance = analyze_by_search_usage(confidence_scores, outcomes, search_used)
             
         else:
             sklearn_brier = None
@@ -124,29 +136,36 @@ def generate_brier_report(days_back: int = 7) -> dict:
     
     return report
 
-def analyze_calibration(entries) -> dict:
+def _summarize(confidence_scores, outcomes) -> dict:
+    """Entry count, Brier score, accuracy and mean confidence for one slice."""
+    return {
+        "entries": int(confidence_scores.size),
+        "brier_score": calculate_brier_score_manual(confidence_scores, outcomes),
+        "accuracy": float(outcomes.mean()),
+        "avg_confidence": float(confidence_scores.mean())
+    }
+
+def analyze_calibration(confidence_scores, outcomes) -> dict:
     """Analyze calibration across confidence bands."""
-    bands = [
-        (0.0, 0.5, "low_confidence"),
-        (0.5, 0.7, "medium_confidence"), 
-        (0.7, 0.9, "high_confidence"),
-        (0.9, 1.0, "very_high_confidence")
-    ]
+    # Bands are half-open [min, max), so a score of exactly 1.0 falls outside all of them
+    in_range = (confidence_scores >= 0.0) & (confidence_scores < 1.0)
+    band_idx = np.digitize(confidence_scores[in_range], BAND_EDGES)
+    n_bands = len(BAND_NAMES)
+    counts = np.bincount(band_idx, minlength=n_bands)
+    conf_sums = np.bincount(band_idx, weights=confidence_scores[in_range], minlength=n_bands)
+    outcome_sums = np.bincount(band_idx, weights=outcomes[in_range], minlength=n_bands)
     
     calibration = {}
-    for min_conf, max_conf, band_name in bands:
-        band_entries = [
-            entry for entry in entries
-            if min_conf <= entry.confidence_score < max_conf
-        ]
-        
-        if band_entries:
-            predicted_prob = sum(entry.confidence_score for entry in band_entries) / len(band_entries)
-            actual_rate = sum(1 for entry in band_entries if entry.outcome) / len(band_entries)
+    for i, band_name in enumerate(BAND_NAMES):
+        count = int(counts[i])
+        if count:
+            min_conf, max_conf = BAND_RANGES[i]
+            predicted_prob = float(conf_sums[i] / count)
+            actual_rate = float(outcome_sums[i] / count)
             calibration_error = abs(predicted_prob - actual_rate)
             
             calibration[band_name] = {
-                "count": len(band_entries),
+                "count": count,
                 "avg_predicted_prob": predicted_prob,
                 "actual_success_rate": actual_rate,
                 "calibration_error": calibration_error,
@@ -156,56 +175,25 @@ def analyze_calibration(entries) -> dict:
     
     return calibration
 
-def analyze_by_model(entries) -> dict:
+def analyze_by_model(confidence_scores, outcomes, models) -> dict:
     """Analyze performance breakdown by model."""
-    models = {}
-    for entry in entries:
-        model = entry.model_used
-        if model not in models:
-            models[model] = []
-        models[model].append(entry)
-    
     model_stats = {}
-    for model, model_entries in models.items():
-        if len(model_entries) > 0:
-            confidence_scores = [entry.confidence_score for entry in model_entries]
-            outcomes = [1.0 if entry.outcome else 0.0 for entry in model_entries]
-            
-            brier_score = calculate_brier_score_manual(confidence_scores, outcomes)
-            accuracy = sum(outcomes) / len(outcomes)
-            avg_confidence = sum(confidence_scores) / len(confidence_scores)
-            
-            model_stats[model] = {
-                "entries": len(model_entries),
-                "brier_score": brier_score,
-                "accuracy": accuracy,
-                "avg_confidence": avg_confidence
-            }
+    for model in dict.fromkeys(models.tolist()):  # first-seen order
+        mask = models == model
+        model_stats[model] = _summarize(confidence_scores[mask], outcomes[mask])
     
     return model_stats
 
-def analyze_by_search_usage(entries) -> dict:
+def analyze_by_search_usage(confidence_scores, outcomes, search_used) -> dict:
     """Analyze performance difference between web search enabled/disabled."""
-    with_search = [entry for entry in entries if entry.web_search_used]
-    without_search = [entry for entry in entries if not entry.web_search_used]
-    
-    def calc_stats(entry_list):
-        if not entry_list:
+    def calc_stats(mask):
+        if not mask.any():
             return None
-        
-        confidence_scores = [entry.confidence_score for entry in entry_list]
-        outcomes = [1.0 if entry.outcome else 0.0 for entry in entry_list]
-        
-        return {
-            "entries": len(entry_list),
-            "brier_score": calculate_brier_score_manual(confidence_scores, outcomes),
-            "accuracy": sum(outcomes) / len(outcomes),
-            "avg_confidence": sum(confidence_scores) / len(confidence_scores)
-        }
+        return _summarize(confidence_scores[mask], outcomes[mask])
     
     return {
-        "with_search": calc_stats(with_search),
-        "without_search": calc_stats(without_search)
+        "with_search": calc_stats(search_used),
+        "without_search": calc_stats(~search_used)
     }
 
 def generate_recommendations(basic_stats, calibration_analysis) -> list:
@@ -0,0 +1,134 @@
+"""
+Unit Tests for Confidence Scoring Aggregates
+Tests that the SQL Brier score and confidence distribution match the per-row
+Python computation they replaced, on a seeded in-memory SQLite database, and
+that retention cleanup deletes only expired entries.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from app.models import ConfidenceLog
+from app.services import confidence_scoring
+from app.services.confidence_scoring import ConfidenceScoringService
+from sqlalchemy import delete, select
+
+BANDS = [(0.0, 0.5, "low"), (0.5, 0.7, "medium"), (0.7, 0.9, "high"), (0.9, 1.0, "very_high")]
+# Band edges, and 1.0 which falls outside every half-open band
+EDGE_SCORES = [0.0, 0.5, 0.7, 0.9, 1.0]
+
+
+@pytest.fixture
+def seeded():
+    """A service on an in-memory database, and the (score, outcome, age_days) rows seeded into it."""
+    rng = random.Random(7)
+    rows = [(rng.random(), rng.choice([True, False, None]), rng.uniform(0, 60)) for _ in range(300)]
+    rows += [(score, outcome, 1) for score in EDGE_SCORES for outcome in (True, False)]
+    service = ConfidenceScoringService("sqlite:///:memory:")
+    now = datetime.utcnow()
+    with service.session_scope(invalidates_stats=True) as db:
+        db.add_all([
+            ConfidenceLog(
+                response_text="advice", confidence_score=score, user_query="query", model_used="test",
+                outcome=outcome, timestamp=now - timedelta(days=age_days)
+            )
+            for score, outcome, age_days in rows
+        ])
+    return service, rows
+
+
+def _with_outcomes(rows, days_back):
+    return [(score, outcome) for score, outcome, age_days in rows if outcome is not None and age_days <= days_back]
+
+
+def _python_brier(rows, days_back):
+    """The per-row computation calculate_brier_score used before it moved to SQL."""
+    entries = _with_outcomes(rows, days_back)
+    total_score = sum((score - (1.0 if outcome else 0.0)) ** 2 for score, outcome in entries)
+    correct_predictions = sum(1 for _, outcome in entries if outcome)
+    return {
+        "brier_score": total_score / len(entries),
+        "entries_count": len(entries),
+        "correct_predictions": correct_predictions,
+        "accuracy": correct_predictions / len(entries),
+        "avg_confidence": sum(score for score, _ in entries) / len(entries),
+    }
+
+
+def _python_distribution(rows, days_back):
+    """The per-row computation get_confidence_distribution used before it moved to SQL."""
+    entries = _with_outcomes(rows, days_back)
+    distribution = {}
+    for min_conf, max_conf, band_name in BANDS:
+        band_entries = [(score, outcome) for score, outcome in entries if min_conf <= score < max_conf]
+        if band_entries:
+            correct = sum(1 for _, outcome in band_entries if outcome)
+            distribution[band_name] = {
+                "count": len(band_entries),
+                "accuracy": correct / len(band_entries),
+                "avg_confidence": sum(score for score, _ in band_entries) / len(band_entries),
+                "range": f"{min_conf}-{max_conf}"
+            }
+        else:
+            distribution[band_name] = {
+                "count": 0, "accuracy": None, "avg_confidence": None, "range": f"{min_conf}-{max_conf}"
+            }
+    return {"distribution": distribution, "total_entries": len(entries), "period_days": days_back}
+
+
+class TestConfidenceAggregates:
+    """Test the SQL aggregates against the Python reference."""
+
+    @pytest.mark.parametrize("days_back", [7, 30])
+    def test_brier_score_matches_python(self, seeded, days_back):
+        service, rows = seeded
+        result = service.calculate_brier_score(days_back)
+        expected = _python_brier(rows, days_back)
+        assert {key: result[key] for key in expected} == pytest.approx(expected)
+        assert result["needs_calibration"] == (expected["brier_score"] > 0.25)
+
+    @pytest.mark.parametrize("days_back", [7, 30])
+    def test_distribution_matches_python(self, seeded, days_back):
+        service, rows = seeded
+        result = service.get_confidence_distribution(days_back)
+        expected = _python_distribution(rows, days_back)
+        assert result["total_entries"] == expected["total_entries"]
+        for band_name, band in expected["distribution"].items():
+            actual = result["distribution"][band_name]
+            assert actual["count"] == band["count"]
+            assert actual["range"] == band["range"]
+            if band["count"]:
+                assert actual["accuracy"] == pytest.approx(band["accuracy"])
+                assert actual["avg_confidence"] == pytest.approx(band["avg_confidence"])
+            else:
+                assert actual["accuracy"] is None and actual["avg_confidence"] is None
+
+    def test_empty_period(self):
+        """With no scored entries, both aggregates report that instead of dividing by zero."""
+        service = ConfidenceScoringService("sqlite:///:memory:")
+        assert service.calculate_brier_score()["brier_score"] is None
+        assert service.get_confidence_distribution() == {"message": "No entries with outcomes found"}
+
+
+class TestCleanup:
+    """Test batched deletion of entries past the retention period."""
+
+    def test_deletes_only_expired_entries_in_batches(self, seeded, monkeypatch):
+        service, rows = seeded
+        monkeypatch.setattr(confidence_scoring, "CLEANUP_BATCH_SIZE", 25)
+        expired = sum(1 for _, _, age_days in rows if age_days > 30)
+        assert service.cleanup_old_entries(days_to_keep=30) == expired
+        with service.session_scope() as db:
+            assert db.query(ConfidenceLog).count() == len(rows) - expired
+
+    def test_batch_selection_uses_timestamp_index(self, seeded):
+        """Each batch is a range search on the timestamp, not a scan of the table."""
+        service, _ = seeded
+        old_ids = select(ConfidenceLog.id).where(ConfidenceLog.timestamp < datetime.utcnow()).limit(25)
+        statement = delete(ConfidenceLog).where(ConfidenceLog.id.in_(old_ids))
+        sql = str(statement.compile(service.engine, compile_kwargs={"literal_binds": True}))
+        with service.engine.connect() as connection:
+            plan = " ".join(row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + sql))
+        assert "ix_conflog_timestamp (timestamp<?)" in plan
+        assert "SCAN" not in plan
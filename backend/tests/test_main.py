@@ -1,6 +1,7 @@
 from fastapi.testclient import TestClient
-from app.main import app
+from app.main import app, get_pybaseball_service
 from app.models import AdviceRequest, Message
+from app.services.pybaseball_service import PyBaseballError
 from unittest.mock import patch, MagicMock
 
 client = TestClient(app)
@@ -55,4 +56,21 @@ def test_get_advice():
 
 def test_get_advice_invalid_request():
     response = client.post("/advice", json={"invalid": "request"})
-    assert response.status_code == 422 
\ No newline at end of file
+    assert response.status_code == 422 
+
+def test_clear_pybaseball_cache_reports_upstream_failure():
+    service = MagicMock()
+    app.dependency_overrides[get_pybaseball_service] = lambda: service
+    try:
+        async def failed():
+            return PyBaseballError("Upstream unavailable")
+        service.clear_pybaseball_cache = failed
+        assert client.post("/pybaseball/cache/clear").status_code == 502
+
+        # A successful result is never mistaken for an error, whatever its wording
+        async def cleared():
+            return "Error retrieving data: none, cache was already empty"
+        service.clear_pybaseball_cache = cleared
+        assert client.post("/pybaseball/cache/clear").status_code == 204
+    finally:
+        app.dependency_overrides.clear()
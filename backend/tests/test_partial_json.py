@@ -0,0 +1,42 @@
+"""
+Unit Tests for Incremental JSON Field Extraction
+Tests that main_advice text is recovered correctly however the JSON is chunked.
+"""
+
+import json
+
+import pytest
+from app.services.partial_json import JsonFieldStream
+
+
+def _feed_in_chunks(text: str, size: int) -> str:
+    stream = JsonFieldStream("main_advice")
+    return "".join(stream.feed(text[i:i + size]) for i in range(0, len(text), size))
+
+
+class TestJsonFieldStream:
+    """Test extraction of a top-level string field from streamed JSON."""
+
+    @pytest.mark.parametrize("size", [1, 3, 1000])
+    def test_extracts_field_across_chunk_boundaries(self, size):
+        """Escapes, including surrogate pairs, decode the same for any chunking."""
+        advice = {
+            "reasoning": "mentions \"main_advice\": inside a string",
+            "details": {"main_advice": "nested, not this one"},
+            "main_advice": "Start Judge 😀\n\"over\" Soto \\ é",
+        }
+        text = json.dumps(advice, indent=2)
+        assert _feed_in_chunks(text, size) == advice["main_advice"]
+
+    def test_stops_after_field_completes(self):
+        """Nothing more is returned once the field's closing quote is seen."""
+        stream = JsonFieldStream("main_advice")
+        assert stream.feed('{"main_advice": "Sit') == "Sit"
+        assert stream.feed(' him", "reasoning": "x"}') == " him"
+        assert stream.done
+
+    def test_plain_text_is_ignored(self):
+        """Responses that aren't a JSON object yield nothing."""
+        stream = JsonFieldStream("main_advice")
+        assert stream.feed("Start Judge this week.") == ""
+        assert stream.done
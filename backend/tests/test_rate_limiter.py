@@ -0,0 +1,129 @@
+"""
+Unit Tests for Client-Side OpenAI Rate Limiting
+Tests bucket refill, request and token limits, and request size estimates, on a fake clock.
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from app.services import rate_limiter as rate_limiter_module
+from app.services.rate_limiter import RateLimiter, estimate_tokens
+
+
+class FakeClock:
+    """Stands in for time.monotonic; sleeping advances it instead of waiting."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    clock = FakeClock()
+    with patch.object(rate_limiter_module.time, "monotonic", clock.monotonic), \
+            patch.object(rate_limiter_module.asyncio, "sleep", clock.sleep):
+        yield clock
+
+
+class TestRateLimiter:
+    """Test the requests-per-minute and tokens-per-minute buckets."""
+
+    def test_disabled_limiter_never_waits(self, clock):
+        """With both limits at 0, acquire returns immediately."""
+        limiter = RateLimiter()
+        assert not limiter.enabled
+        asyncio.run(limiter.acquire(10 ** 6))
+        assert clock.sleeps == []
+
+    def test_burst_up_to_request_limit_then_waits(self, clock):
+        """A full bucket serves a burst; the next request waits for one to refill."""
+        limiter = RateLimiter(requests_per_minute=60)
+
+        async def run():
+            for _ in range(60):
+                await limiter.acquire()
+            assert clock.sleeps == []
+            await limiter.acquire()
+
+        asyncio.run(run())
+        assert clock.sleeps == [pytest.approx(1.0)]
+
+    def test_request_bucket_refills_over_time(self, clock):
+        """Capacity comes back in proportion to elapsed time, capped at the limit."""
+        limiter = RateLimiter(requests_per_minute=60)
+
+        async def run():
+            for _ in range(60):
+                await limiter.acquire()
+            clock.now += 10
+            for _ in range(10):
+                await limiter.acquire()
+            assert clock.sleeps == []
+            clock.now += 3600
+            for _ in range(60):
+                await limiter.acquire()
+            assert clock.sleeps == []
+            await limiter.acquire()
+
+        asyncio.run(run())
+        assert clock.sleeps == [pytest.approx(1.0)]
+
+    def test_token_limit_waits_for_enough_tokens(self, clock):
+        """A request waits until the token bucket covers its estimate."""
+        limiter = RateLimiter(tokens_per_minute=6000)
+
+        async def run():
+            await limiter.acquire(5000)
+            await limiter.acquire(3000)
+
+        asyncio.run(run())
+        # 2000 tokens short at 100 tokens per second
+        assert clock.sleeps == [pytest.approx(20.0)]
+
+    def test_oversized_request_waits_for_a_full_bucket(self, clock):
+        """A request larger than the token limit is clamped instead of waiting forever."""
+        limiter = RateLimiter(tokens_per_minute=600)
+
+        async def run():
+            await limiter.acquire(600)
+            await limiter.acquire(10 ** 6)
+
+        asyncio.run(run())
+        assert sum(clock.sleeps) == pytest.approx(60.0)
+
+    def test_both_limits_wait_for_the_slower(self, clock):
+        """When both buckets are short, the wait covers the larger shortfall."""
+        limiter = RateLimiter(requests_per_minute=1, tokens_per_minute=6000)
+
+        async def run():
+            await limiter.acquire(6000)
+            await limiter.acquire(100)
+
+        asyncio.run(run())
+        # Tokens alone would need 1s; the request bucket needs 60s
+        assert clock.sleeps == [pytest.approx(60.0)]
+
+
+class TestEstimateTokens:
+    """Test the request size estimate used for the token bucket."""
+
+    def test_counts_input_and_reserved_output(self):
+        """String input counts about one token per four characters, plus max_output_tokens."""
+        assert estimate_tokens({"input": "x" * 400, "max_output_tokens": 50}) == 150
+
+    def test_structured_input_is_measured_as_json(self):
+        """List input is sized by its JSON encoding."""
+        request_input = [{"role": "user", "content": "x" * 400}]
+        assert estimate_tokens({"input": request_input}) > 100
+
+    def test_missing_fields_count_as_zero(self):
+        assert estimate_tokens({}) == 0
@@ -0,0 +1,117 @@
+"""
+Unit Tests for the Advice Response Cache
+Tests key versioning, per-entry TTLs, clearing, and stream replay on the in-process cache.
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from app.models import StructuredAdvice
+from app.services import response_cache as response_cache_module
+from app.services.response_cache import ResponseCache
+
+REQUEST = {"model": "gpt-4.1", "input": "Judge or Soto?", "tools": [{"type": "web_search"}]}
+
+
+class FakeClock:
+    """Stands in for time.monotonic so expiry can be tested without waiting."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(clock):
+    # The local cache reads its timer when it is built
+    with patch.object(response_cache_module.time, "monotonic", clock):
+        return ResponseCache()
+
+
+def _advice(text="Start Judge"):
+    return StructuredAdvice(main_advice=text, confidence_score=0.8)
+
+
+class TestCacheKeys:
+    """Test how requests map to cache keys."""
+
+    def test_key_ignores_argument_order(self):
+        """Requests with the same parameters in a different order share a key."""
+        reordered = dict(reversed(list(REQUEST.items())))
+        assert ResponseCache.make_key(REQUEST) == ResponseCache.make_key(reordered)
+
+    def test_key_depends_on_request_and_prefix(self):
+        assert ResponseCache.make_key(REQUEST) != ResponseCache.make_key({**REQUEST, "input": "Who else?"})
+        assert ResponseCache.make_key(REQUEST) != ResponseCache.make_key(REQUEST, prefix="advice-stream")
+
+    def test_key_is_versioned_by_advice_schema(self):
+        """A change to the StructuredAdvice schema changes every key."""
+        key = ResponseCache.make_key(REQUEST)
+        assert key.startswith(f"advice:{response_cache_module._ADVICE_SCHEMA_VERSION}:")
+        with patch.object(response_cache_module, "_ADVICE_SCHEMA_VERSION", "0" * 12):
+            assert ResponseCache.make_key(REQUEST) != key
+
+
+class TestLocalCache:
+    """Test the in-process cache used when Redis isn't configured."""
+
+    def test_advice_round_trip(self, cache):
+        key = ResponseCache.make_key(REQUEST)
+
+        async def run():
+            assert await cache.get(key) is None
+            await cache.set(key, _advice())
+            return await cache.get(key)
+
+        assert asyncio.run(run()) == _advice()
+
+    def test_entries_expire_after_their_own_ttl(self, cache, clock):
+        """Each entry lives for the TTL it was stored with."""
+
+        async def run():
+            await cache.set("advice:short", _advice("short"), ttl=10)
+            await cache.set("advice:long", _advice("long"), ttl=100)
+            clock.now += 11
+            assert await cache.get("advice:short") is None
+            assert await cache.get("advice:long") == _advice("long")
+            clock.now += 90
+            assert await cache.get("advice:long") is None
+
+        asyncio.run(run())
+
+    def test_zero_ttl_is_not_stored(self, cache):
+        async def run():
+            await cache.set("advice:k", _advice(), ttl=0)
+            return await cache.get("advice:k")
+
+        assert asyncio.run(run()) is None
+
+    def test_unreadable_entry_is_a_miss(self, cache):
+        """Bytes that don't validate as StructuredAdvice are treated as a miss."""
+
+        async def run():
+            await cache.set_stream("advice:k", b'{"unexpected": true}', ttl=10)
+            return await cache.get("advice:k")
+
+        assert asyncio.run(run()) is None
+
+    def test_stream_round_trip_and_clear(self, cache):
+        """Stream bytes come back unchanged, and clear drops advice and streams alike."""
+        frames = b'data: {"type":"text","delta":"Start"}\n\n'
+
+        async def run():
+            await cache.set("advice:k", _advice())
+            await cache.set_stream("advice-stream:k", frames)
+            assert await cache.get_stream("advice-stream:k") == frames
+            await cache.clear()
+            return await cache.get("advice:k"), await cache.get_stream("advice-stream:k")
+
+        assert asyncio.run(run()) == (None, None)
@@ -0,0 +1,65 @@
+"""
+Unit Tests for Batched Confidence Logging
+Tests that queued log entries are written, and that one bad entry doesn't lose its batch.
+"""
+
+import json
+import time
+
+import pytest
+from app.models import StructuredAdvice
+from app.services.confidence_scoring import ConfidenceScoringService
+from app.services.response_logger import ResponseLogger
+
+
+@pytest.fixture
+def response_logger():
+    """A ResponseLogger writing to its own in-memory database."""
+    logger = ResponseLogger()
+    logger.confidence_service = ConfidenceScoringService("sqlite:///:memory:")
+    return logger
+
+
+def _enqueue(response_logger, response_id):
+    advice = StructuredAdvice(main_advice=f"Advice {response_id}", confidence_score=0.8)
+    assert response_logger.enqueue_response(advice, "Who should I start?", response_id=response_id)
+
+
+class TestBatchedLogging:
+    """Test the background writer behind enqueue_response."""
+
+    def test_queued_entries_are_written(self, response_logger):
+        """Entries queued together are all readable after a flush."""
+        for response_id in ("r0", "r1", "r2"):
+            _enqueue(response_logger, response_id)
+        assert response_logger.flush()
+        logs = response_logger.get_recent_logs(include_content=False)
+        assert sorted(log["response_id"] for log in logs) == ["r0", "r1", "r2"]
+
+    def test_duplicate_only_loses_itself(self, response_logger):
+        """A duplicate response_id fails the batch insert; the other entries still land."""
+        for response_id in ("r0", "r1", "r2", "r0", "r9"):
+            _enqueue(response_logger, response_id)
+        assert response_logger.flush()
+        logs = response_logger.get_recent_logs(include_content=False)
+        assert sorted(log["response_id"] for log in logs) == ["r0", "r1", "r2", "r9"]
+
+    def test_flush_is_bounded(self, response_logger):
+        """flush() gives up after its timeout instead of waiting on a stalled writer."""
+        def stalled_write(entries):
+            time.sleep(1)
+            return len(entries)
+        response_logger.confidence_service.log_confidence_entries = stalled_write
+        _enqueue(response_logger, "r0")
+        started = time.monotonic()
+        assert not response_logger.flush(timeout=0.1)
+        assert time.monotonic() - started < 0.5
+
+    def test_conversation_context_is_returned_as_json(self, response_logger):
+        """The context is stored as a JSON column but still read back as a JSON string."""
+        advice = StructuredAdvice(main_advice="Start Judge", confidence_score=0.8)
+        conversation = [{"role": "user", "content": "Judge or Soto?"}]
+        assert response_logger.enqueue_response(advice, "Judge or Soto?", conversation, response_id="r0")
+        assert response_logger.flush()
+        [log] = response_logger.get_recent_logs()
+        assert json.loads(log["conversation_context"])["last_messages"] == conversation
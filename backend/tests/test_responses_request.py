@@ -0,0 +1,54 @@
+"""
+Unit Tests for OpenAI Responses API Requests
+Tests that the arguments passed to `responses.create` are accepted by the installed SDK.
+"""
+
+import asyncio
+import inspect
+from unittest.mock import patch
+
+from app.services import openai_client
+from openai.resources.responses import AsyncResponses
+
+# The SDK's own signature rejects unknown keyword arguments with a TypeError
+CREATE_SIGNATURE = inspect.signature(AsyncResponses.create)
+
+
+class _StopRequest(Exception):
+    pass
+
+
+class _RecordingClient:
+    """Stands in for AsyncOpenAI; records the arguments of responses.create and stops there."""
+
+    def __init__(self):
+        self.calls = []
+        self.responses = self
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        raise _StopRequest()
+
+
+class TestCreateArguments:
+    """Test request arguments against AsyncResponses.create."""
+
+    def test_non_streaming_request(self):
+        request = openai_client._build_response_request(
+            "Judge or Soto?", "gpt-4.1", "Be brief.", 500, True, "default"
+        )
+        CREATE_SIGNATURE.bind(None, **request)
+        assert request["extra_body"]["prompt_cache_key"]
+
+    def test_streaming_request(self):
+        client = _RecordingClient()
+
+        async def run():
+            with patch.object(openai_client, "_get_stream_client", return_value=client):
+                async for _ in openai_client.get_streaming_response("Judge or Soto?", cache_ttl=0):
+                    pass
+
+        asyncio.run(run())
+        [request] = client.calls
+        CREATE_SIGNATURE.bind(None, **request)
+        assert request["extra_body"]["prompt_cache_key"]
@@ -0,0 +1,41 @@
+"""
+Unit Tests for Stream Event Pacing
+Tests that coalesced text is flushed when its window closes, even while OpenAI is quiet.
+"""
+
+import asyncio
+import time
+
+from app.services import openai_client
+
+
+async def _paused_stream():
+    yield "first"
+    await asyncio.sleep(0.3)
+    yield "second"
+
+
+async def _collect(flush_at):
+    started = time.monotonic()
+    items = []
+    async for item in openai_client._with_heartbeats(_paused_stream(), 0, lambda: flush_at[0]):
+        items.append((item, time.monotonic() - started))
+        if item is openai_client._FLUSH_DUE:
+            flush_at[0] = None
+    return items
+
+
+class TestTrailingFlush:
+    """Test the flush deadline of _with_heartbeats."""
+
+    def test_flush_due_fires_during_a_pause(self):
+        """A deadline inside a gap between events is reported before the next event."""
+        flush_at = [time.monotonic() + 0.05]
+        items = asyncio.run(_collect(flush_at))
+        assert [item for item, _ in items] == ["first", openai_client._FLUSH_DUE, "second"]
+        assert items[1][1] < 0.2
+
+    def test_no_deadline_means_no_flush(self):
+        """Without pending text, only the stream's own events come through."""
+        items = asyncio.run(_collect([None]))
+        assert [item for item, _ in items] == ["first", "second"]
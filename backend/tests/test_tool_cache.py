@@ -0,0 +1,44 @@
+"""
+Unit Tests for the PyBaseball Tool Result Cache
+Tests that successful tool results are reused and failed ones are retried.
+"""
+
+import asyncio
+from unittest.mock import patch
+
+from app.services import openai_client
+from app.services.pybaseball_service import PyBaseballError
+
+
+def _run_standings(years, result_for):
+    calls = []
+
+    async def standings(year):
+        calls.append(year)
+        return result_for(year)
+
+    async def run():
+        with patch.object(openai_client.pybaseball_service, "get_mlb_standings", side_effect=standings):
+            return [await openai_client._run_tool("get_mlb_standings", {"year": year}) for year in years]
+
+    openai_client._tool_cache.clear()
+    try:
+        return asyncio.run(run()), calls
+    finally:
+        openai_client._tool_cache.clear()
+
+
+class TestToolResultCache:
+    """Test _run_tool's per-tool, per-arguments cache."""
+
+    def test_successful_results_are_reused(self):
+        """Repeat calls with the same arguments don't reach the service."""
+        results, calls = _run_standings([2024, 2024, 2023], lambda year: {"year": year})
+        assert results == [{"year": 2024}, {"year": 2024}, {"year": 2023}]
+        assert calls == [2024, 2023]
+
+    def test_failures_are_not_cached(self):
+        """A PyBaseballError result is retried on the next call."""
+        results, calls = _run_standings([2024, 2024], lambda year: PyBaseballError("Service unavailable"))
+        assert all(isinstance(result, PyBaseballError) for result in results)
+        assert calls == [2024, 2024]